@@ -8,17 +8,43 @@ Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 import os
 import sys
 import typing
-from Parser import Parser
+from Parser import (Parser, C_ARITHMETIC, C_PUSH, C_POP, C_LABEL, C_GOTO,
+                    C_IF, C_FUNCTION, C_RETURN, C_CALL)
 from CodeWriter import CodeWriter
 
+# Command handlers indexed by Parser.command_code, so translating a command is
+# a single list lookup instead of a chain of command_type() comparisons.
+COMMAND_HANDLERS = [None] * 9
+COMMAND_HANDLERS[C_ARITHMETIC] = lambda parser, code_writer: \
+    code_writer.write_arithmetic(parser.arg1())
+COMMAND_HANDLERS[C_PUSH] = lambda parser, code_writer: \
+    code_writer.write_push_pop("C_PUSH", parser.arg1(), parser.arg2())
+COMMAND_HANDLERS[C_POP] = lambda parser, code_writer: \
+    code_writer.write_push_pop("C_POP", parser.arg1(), parser.arg2())
+COMMAND_HANDLERS[C_LABEL] = lambda parser, code_writer: \
+    code_writer.write_label(parser.arg1())
+COMMAND_HANDLERS[C_GOTO] = lambda parser, code_writer: \
+    code_writer.write_goto(parser.arg1())
+COMMAND_HANDLERS[C_IF] = lambda parser, code_writer: \
+    code_writer.write_if(parser.arg1())
+COMMAND_HANDLERS[C_FUNCTION] = lambda parser, code_writer: \
+    code_writer.write_function(parser.arg1(), parser.arg2())
+COMMAND_HANDLERS[C_RETURN] = lambda parser, code_writer: \
+    code_writer.write_return()
+COMMAND_HANDLERS[C_CALL] = lambda parser, code_writer: \
+    code_writer.write_call(parser.arg1(), parser.arg2())
+
 
 def translate_file(
-        input_file: typing.TextIO, output_file: typing.TextIO, 
-        filename: str, code_writer: CodeWriter) -> None:
+        input_file: typing.Union[typing.BinaryIO, typing.List[bytes]],
+        output_file: typing.TextIO, filename: str,
+        code_writer: CodeWriter) -> None:
     """Translates a single file.
 
     Args:
-        input_file (typing.TextIO): the file to translate.
+        input_file (typing.Union[typing.BinaryIO, typing.List[bytes]]): the
+            file to translate (opened in binary mode), or its already-split
+            lines.
         output_file (typing.TextIO): writes all output to this file.
         filename (str): the filename without extension (for static variables and label scoping).
         code_writer (CodeWriter): the CodeWriter instance to use.
@@ -31,25 +57,12 @@ def translate_file(
     code_writer.set_file_name(filename)
     while parser.has_more_commands():
         parser.advance()
-        if parser.cur_com == '':
+        if parser.cur_com == b'':
             break
-        # Command can be a valid command, or a '' indicating no command found after last command
-        if parser.command_type() == 'C_ARITHMETIC':
-            code_writer.write_arithmetic(parser.arg1())
-        elif parser.command_type() == 'C_PUSH' or parser.command_type() == 'C_POP':
-            code_writer.write_push_pop(parser.command_type(), parser.arg1(), parser.arg2())
-        elif parser.command_type() == 'C_LABEL':
-            code_writer.write_label(parser.arg1())
-        elif parser.command_type() == 'C_GOTO':
-            code_writer.write_goto(parser.arg1())
-        elif parser.command_type() == 'C_IF':
-            code_writer.write_if(parser.arg1())
-        elif parser.command_type() == 'C_FUNCTION':
-            code_writer.write_function(parser.arg1(), parser.arg2())
-        elif parser.command_type() == 'C_CALL':
-            code_writer.write_call(parser.arg1(), parser.arg2())
-        elif parser.command_type() == 'C_RETURN':
-            code_writer.write_return()
+        # Command can be a valid command, or a b'' indicating no command found after last command
+        command_code = parser.command_code
+        if command_code >= 0:
+            COMMAND_HANDLERS[command_code](parser, code_writer)
 
 
 
@@ -63,27 +76,33 @@ if "__main__" == __name__:
         sys.exit("Invalid usage, please use: VMtranslator <input path>")
     argument_path = os.path.abspath(sys.argv[1])
     if os.path.isdir(argument_path):
-        # Filter for .vm files only, then sort so Sys.vm comes first (if it exists)
-        all_files = [os.path.join(argument_path, filename) 
-                     for filename in os.listdir(argument_path)]
-        files_to_translate = [f for f in all_files 
-                             if os.path.splitext(f)[1].lower() == '.vm']
-        files_to_translate.sort(key=lambda x: (os.path.basename(x) != 'Sys.vm', x))
+        # Filter for .vm files only, then sort so Sys.vm comes first (if it
+        # exists). Each entry's name is inspected once, while scanning.
+        entries = []
+        with os.scandir(argument_path) as directory:
+            for entry in directory:
+                name = entry.name
+                if name.lower().endswith('.vm'):
+                    entries.append((name != 'Sys.vm', name, entry.path))
+        entries.sort()
+        files_to_translate = [(name[:-3], path) for _, name, path in entries]
         output_path = os.path.join(argument_path, os.path.basename(
             argument_path))
     else:
-        files_to_translate = [argument_path]
         output_path, extension = os.path.splitext(argument_path)
+        files_to_translate = [(os.path.basename(output_path), argument_path)]
     output_path += ".asm"
     
+    # Read every input once up-front, keeping (filename, content) pairs so
+    # file boundaries are preserved for static variables and label scoping.
+    sources = []
+    for filename_without_ext, input_path in files_to_translate:
+        with open(input_path, 'rb') as input_file:
+            sources.append((filename_without_ext, input_file.read()))
+
     # Check if any file contains Sys.init (requires bootstrap code)
-    has_sys_init = False
-    for input_path in files_to_translate:
-        with open(input_path, 'r') as f:
-            content = f.read()
-            if 'function Sys.init' in content:
-                has_sys_init = True
-                break
+    has_sys_init = any(b'function Sys.init' in content
+                       for _, content in sources)
     
     with open(output_path, 'w') as output_file:
         code_writer = CodeWriter(output_file)
@@ -92,7 +111,6 @@ if "__main__" == __name__:
         if has_sys_init:
             code_writer.write_bootstrap()
         
-        for input_path in files_to_translate:
-            with open(input_path, 'r') as input_file:
-                filename_without_ext, _ = os.path.splitext(os.path.basename(input_path))
-                translate_file(input_file, output_file, filename_without_ext, code_writer)
+        for filename_without_ext, content in sources:
+            translate_file(content.splitlines(), output_file,
+                           filename_without_ext, code_writer)
@@ -7,6 +7,28 @@ Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
 import typing
 
+# Integer codes for the command types, indexed into COMMAND_TYPES. Main uses
+# them to dispatch through a list instead of comparing type strings.
+(C_ARITHMETIC, C_PUSH, C_POP, C_LABEL, C_GOTO, C_IF, C_FUNCTION, C_RETURN,
+ C_CALL) = range(9)
+
+COMMAND_TYPES = ("C_ARITHMETIC", "C_PUSH", "C_POP", "C_LABEL", "C_GOTO",
+                 "C_IF", "C_FUNCTION", "C_RETURN", "C_CALL")
+
+_COMMAND_CODES = {
+    b"push": C_PUSH,
+    b"pop": C_POP,
+    b"label": C_LABEL,
+    b"goto": C_GOTO,
+    b"if-goto": C_IF,
+    b"function": C_FUNCTION,
+    b"call": C_CALL,
+    b"return": C_RETURN,
+}
+for _arithmetic in (b"add", b"sub", b"neg", b"and", b"or", b"not",
+                    b"shiftleft", b"shiftright", b"eq", b"gt", b"lt"):
+    _COMMAND_CODES[_arithmetic] = C_ARITHMETIC
+
 
 class Parser:
     """
@@ -46,17 +68,30 @@ class Parser:
       - return
     """
 
-    def __init__(self, input_file: typing.TextIO) -> None:
+    def __init__(
+            self,
+            input_file: typing.Union[typing.BinaryIO, typing.List[bytes]]
+    ) -> None:
         """Gets ready to parse the input file.
 
+        The input is handled as raw bytes: .vm files are plain ASCII, so
+        splitting and stripping bytes avoids the str decoding overhead.
+
         Args:
-            input_file (typing.TextIO): input file.
+            input_file (typing.Union[typing.BinaryIO, typing.List[bytes]]):
+            input file opened in binary mode, or its lines if the caller has
+            already read and split it.
         """
         # Your code goes here!
         # A good place to start is to read all the lines of the input:
         # input_lines = input_file.read().splitlines()
-        self.input_lines = input_file.read().splitlines()
-        self.cur_com = ''
+        if isinstance(input_file, list):
+            self.input_lines = input_file
+        else:
+            self.input_lines = input_file.read().splitlines()
+        self.cur_com = b''
+        # Integer code of the current command (-1 if none or unknown).
+        self.command_code = -1
 
 
     def has_more_commands(self) -> bool:
@@ -78,12 +113,13 @@ class Parser:
         # Your code goes here!
         self.cur_com = self.input_lines.pop(0)
         # print("Preloop: ", self.cur_com)
-        while (self.cur_com.startswith('//') or self.cur_com.isspace() or self.cur_com == '') and self.has_more_commands():
+        while (self.cur_com.startswith(b'//') or self.cur_com.isspace() or self.cur_com == b'') and self.has_more_commands():
             self.cur_com = self.input_lines.pop(0)
             # print("loop command: ", self.cur_com)
         # print("Postloop: ", self.cur_com)
         self.cur_com = self.cur_com.strip()
-        self.cur_com = self.cur_com.split('//')[0].strip()
+        self.cur_com = self.cur_com.split(b'//')[0].strip()
+        self.command_code = _COMMAND_CODES.get(self.cur_com.split(b' ')[0], -1)
 
 
     def command_type(self) -> str:
@@ -96,25 +132,9 @@ class Parser:
             "C_RETURN", "C_CALL".
         """
         # Your code goes here!
-        first_arg = self.cur_com.split(' ')[0]
-        if first_arg == 'push':
-            return 'C_PUSH'
-        elif first_arg == 'pop':
-            return 'C_POP'
-        elif first_arg in ["add", "sub", "neg", "and", "or", "not", "shiftleft", "shiftright", "eq", "gt", "lt"]:
-            return 'C_ARITHMETIC'
-        elif first_arg == 'label':
-            return "C_LABEL"
-        elif first_arg == "goto":
-            return "C_GOTO"
-        elif first_arg == "if-goto":
-            return "C_IF"
-        elif first_arg == "function":
-            return "C_FUNCTION"
-        elif first_arg == "call":
-            return "C_CALL"
-        elif first_arg == "return":
-            return "C_RETURN"
+        if self.command_code < 0:
+            return None
+        return COMMAND_TYPES[self.command_code]
 
     def arg1(self) -> str:
         """
@@ -124,14 +144,15 @@ class Parser:
             Should not be called if the current command is "C_RETURN".
         """
         # Your code goes here!
-        if self.command_type() == 'C_ARITHMETIC':
-            return self.cur_com
-        elif self.command_type() == 'C_PUSH' or self.command_type() == 'C_POP':
-            return self.cur_com.split(' ')[1] # In case of a push or pop we return the segment. i.e. push local 0 returns local
-        elif self.command_type() == 'C_LABEL' or self.command_type() == 'C_GOTO' or self.command_type() == 'C_IF':
-            return self.cur_com.split(' ')[1]
-        elif self.command_type() == 'C_FUNCTION' or self.command_type() == 'C_CALL':
-            return self.cur_com.split(' ')[1]  # Function name is the first argument
+        code = self.command_code
+        if code == C_ARITHMETIC:
+            return self.cur_com.decode('ascii')
+        elif code == C_PUSH or code == C_POP:
+            return self.cur_com.split(b' ')[1].decode('ascii') # In case of a push or pop we return the segment. i.e. push local 0 returns local
+        elif code == C_LABEL or code == C_GOTO or code == C_IF:
+            return self.cur_com.split(b' ')[1].decode('ascii')
+        elif code == C_FUNCTION or code == C_CALL:
+            return self.cur_com.split(b' ')[1].decode('ascii')  # Function name is the first argument
         else:
             return None
 
@@ -143,15 +164,16 @@ class Parser:
             "C_FUNCTION" or "C_CALL".
         """
         # Your code goes here!
-        if self.command_type() == 'C_PUSH' or self.command_type() == 'C_POP':
-            return int(self.cur_com.split(' ')[2])
-        elif self.command_type() == 'C_FUNCTION' or self.command_type() == 'C_CALL':
-            return int(self.cur_com.split(' ')[2])  # Number of vars/args is the second argument
-        elif self.command_type() == 'C_LABEL' or self.command_type() == 'C_GOTO' or self.command_type() == 'C_IF':
+        code = self.command_code
+        if code == C_PUSH or code == C_POP:
+            return int(self.cur_com.split(b' ')[2])
+        elif code == C_FUNCTION or code == C_CALL:
+            return int(self.cur_com.split(b' ')[2])  # Number of vars/args is the second argument
+        elif code == C_LABEL or code == C_GOTO or code == C_IF:
             return None  # These commands don't have a second argument
-        elif self.command_type() == 'C_RETURN':
+        elif code == C_RETURN:
             return None
-        elif self.command_type() == 'C_ARITHMETIC':
+        elif code == C_ARITHMETIC:
             return None
         else:
             return None
@@ -6,6 +6,37 @@ as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
 import typing
+from JackTokenizer import Keywords, Symbols
+
+
+# Complete XML elements for every symbol (escaped) and keyword, and templates
+# for the elements whose text varies, so that no f-string is formatted per
+# token.
+_SYMBOL_ESCAPES = {"<": "&lt;", ">": "&gt;", "&": "&amp;"}
+_SYMBOL_XML = {symbol: "<symbol> %s </symbol>\n"
+                       % _SYMBOL_ESCAPES.get(symbol, symbol)
+               for symbol in Symbols}
+_KEYWORD_XML = {keyword: "<keyword> %s </keyword>\n" % keyword
+                for keyword in Keywords}
+_IDENTIFIER_XML = "<identifier> %s </identifier>\n"
+_INT_CONST_XML = "<integerConstant> %d </integerConstant>\n"
+_STRING_CONST_XML = "<stringConstant> %s </stringConstant>\n"
+
+# Token groups tested on every parse step, as frozensets so that membership
+# is a single hash lookup instead of a scan over a new list.
+_CLASS_VAR_KEYWORDS = frozenset(("STATIC", "FIELD"))
+_SUBROUTINE_KEYWORDS = frozenset(("CONSTRUCTOR", "FUNCTION", "METHOD"))
+_STATEMENT_KEYWORDS = frozenset(("LET", "IF", "WHILE", "DO", "RETURN"))
+_PRIMITIVE_TYPE_KEYWORDS = frozenset(("INT", "CHAR", "BOOLEAN"))
+_KEYWORD_CONSTANTS = frozenset(("true", "false", "null", "this"))
+_OPS = frozenset(("+", "-", "*", "/", "&", "|", "<", ">", "="))
+_UNARY_OPS = frozenset(("-", "~", "^", "#"))
+_EXPRESSION_END = frozenset((";", "]", ")", ","))
+
+# Escapes for the XML special characters, applied in one str.translate pass.
+_XML_ESCAPES = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+_XML_SPECIAL_CHARS = frozenset('&<>"')
 
 
 class CompilationEngine:
@@ -13,6 +44,10 @@ class CompilationEngine:
     output stream.
     """
 
+    # Fixed attribute layout: the engine is instantiated once per file and
+    # tokenizer and _out_append are read on every token.
+    __slots__ = ("tokenizer", "output", "_out", "_out_append")
+
     def __init__(self, input_stream: "JackTokenizer", output_stream) -> None:
         """
         Creates a new compilation engine with the given input and output. The
@@ -22,13 +57,17 @@ class CompilationEngine:
         """
         self.tokenizer = input_stream
         self.output = output_stream
+        # XML fragments are collected here and written out in one call at
+        # the end of compile_class.
+        self._out = []
+        self._out_append = self._out.append
 
     def _escape_xml(self, token: str) -> str:
         """Escapes XML special characters (<, >, &, \")."""
-        return token.replace("&", "&amp;") \
-                    .replace("<", "&lt;") \
-                    .replace(">", "&gt;") \
-                    .replace('"', "&quot;")
+        # Most tokens contain none of them and are returned as they are.
+        if _XML_SPECIAL_CHARS.isdisjoint(token):
+            return token
+        return token.translate(_XML_ESCAPES)
 
     def compile_class(self) -> None:
         """Compiles a complete class.
@@ -38,39 +77,41 @@ class CompilationEngine:
         if self.tokenizer.token_type() != "KEYWORD" or self.tokenizer.keyword() != "CLASS":
             raise ValueError(f"Expected 'class', got {self.tokenizer.current_token}")
         
-        self.output.write("<class>\n")
-        self.output.write(f"<keyword> class </keyword>\n")
+        self._out_append("<class>\n")
+        self._out_append("<keyword> class </keyword>\n")
         self.tokenizer.advance()
         
         # Expect className (identifier)
         if self.tokenizer.token_type() != "IDENTIFIER":
             raise ValueError(f"Expected className, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+        self._out_append(_IDENTIFIER_XML % self.tokenizer.identifier())
         self.tokenizer.advance()
         
         # Expect '{'
         if self.tokenizer.current_token != "{":
             raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> {{ </symbol>\n")
+        self._out_append("<symbol> { </symbol>\n")
         self.tokenizer.advance()
         
         # Parse classVarDec* (zero or more)
         while (self.tokenizer.token_type() == "KEYWORD" and 
-               self.tokenizer.keyword() in ["STATIC", "FIELD"]):
+               self.tokenizer.keyword() in _CLASS_VAR_KEYWORDS):
             self.compile_class_var_dec()
         
         # Parse subroutineDec* (zero or more)
         while (self.tokenizer.token_type() == "KEYWORD" and 
-               self.tokenizer.keyword() in ["CONSTRUCTOR", "FUNCTION", "METHOD"]):
+               self.tokenizer.keyword() in _SUBROUTINE_KEYWORDS):
             self.compile_subroutine()
         
         # Expect '}'
         if self.tokenizer.current_token != "}":
             raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> }} </symbol>\n")
+        self._out_append("<symbol> } </symbol>\n")
         self.tokenizer.advance()
         
-        self.output.write("</class>\n")
+        self._out_append("</class>\n")
+        self.output.write("".join(self._out))
+        self._out.clear()
         
 
     def compile_class_var_dec(self) -> None:
@@ -78,13 +119,13 @@ class CompilationEngine:
         Grammar: ('static' | 'field') type varName (',' varName)* ';'
         """
         if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() in ["STATIC", "FIELD"]):
+                self.tokenizer.keyword() in _CLASS_VAR_KEYWORDS):
             return
         
-        self.output.write("<classVarDec>\n")
+        self._out_append("<classVarDec>\n")
         
         # Parse 'static' or 'field'
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        self._out_append(_KEYWORD_XML[self.tokenizer.current_token])
         self.tokenizer.advance()
         
         # Parse type
@@ -94,11 +135,11 @@ class CompilationEngine:
         while True:
             if self.tokenizer.token_type() != "IDENTIFIER":
                 raise ValueError(f"Expected identifier, got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+            self._out_append(_IDENTIFIER_XML % self.tokenizer.identifier())
             self.tokenizer.advance()
             
             if self.tokenizer.current_token == ",":
-                self.output.write(f"<symbol> , </symbol>\n")
+                self._out_append("<symbol> , </symbol>\n")
                 self.tokenizer.advance()
             else:
                 break
@@ -106,10 +147,10 @@ class CompilationEngine:
         # Expect ';'
         if self.tokenizer.current_token != ";":
             raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
+        self._out_append("<symbol> ; </symbol>\n")
         self.tokenizer.advance()
         
-        self.output.write("</classVarDec>\n")
+        self._out_append("</classVarDec>\n")
 
     def compile_subroutine(self) -> None:
         """
@@ -118,18 +159,18 @@ class CompilationEngine:
                  subroutineName '(' parameterList ')' subroutineBody
         """
         if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() in ["CONSTRUCTOR", "FUNCTION", "METHOD"]):
+                self.tokenizer.keyword() in _SUBROUTINE_KEYWORDS):
             return
         
-        self.output.write("<subroutineDec>\n")
+        self._out_append("<subroutineDec>\n")
         
         # Parse 'constructor', 'function', or 'method'
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        self._out_append(_KEYWORD_XML[self.tokenizer.current_token])
         self.tokenizer.advance()
         
         # Parse return type ('void' or type)
         if self.tokenizer.token_type() == "KEYWORD" and self.tokenizer.keyword() == "VOID":
-            self.output.write(f"<keyword> void </keyword>\n")
+            self._out_append("<keyword> void </keyword>\n")
             self.tokenizer.advance()
         else:
             self._parse_type()
@@ -137,13 +178,13 @@ class CompilationEngine:
         # Parse subroutineName (identifier)
         if self.tokenizer.token_type() != "IDENTIFIER":
             raise ValueError(f"Expected subroutine name, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+        self._out_append(_IDENTIFIER_XML % self.tokenizer.identifier())
         self.tokenizer.advance()
         
         # Parse '('
         if self.tokenizer.current_token != "(":
             raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
+        self._out_append("<symbol> ( </symbol>\n")
         self.tokenizer.advance()
         
         # Parse parameterList
@@ -152,24 +193,24 @@ class CompilationEngine:
         # Parse ')'
         if self.tokenizer.current_token != ")":
             raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
+        self._out_append("<symbol> ) </symbol>\n")
         self.tokenizer.advance()
         
         # Parse subroutineBody
         self.compile_subroutine_body()
         
-        self.output.write("</subroutineDec>\n")
+        self._out_append("</subroutineDec>\n")
 
     def compile_parameter_list(self) -> None:
         """Compiles a (possibly empty) parameter list, not including the 
         enclosing "()".
         Grammar: ((type varName) (',' type varName)*)?
         """
-        self.output.write("<parameterList>\n")
+        self._out_append("<parameterList>\n")
         
         # Check if parameter list is empty
         if self.tokenizer.current_token == ")":
-            self.output.write("</parameterList>\n")
+            self._out_append("</parameterList>\n")
             return
         
         # Parse first parameter
@@ -177,22 +218,22 @@ class CompilationEngine:
         
         if self.tokenizer.token_type() != "IDENTIFIER":
             raise ValueError(f"Expected parameter name, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+        self._out_append(_IDENTIFIER_XML % self.tokenizer.identifier())
         self.tokenizer.advance()
         
         # Parse additional parameters
         while self.tokenizer.current_token == ",":
-            self.output.write(f"<symbol> , </symbol>\n")
+            self._out_append("<symbol> , </symbol>\n")
             self.tokenizer.advance()
             
             self._parse_type()
             
             if self.tokenizer.token_type() != "IDENTIFIER":
                 raise ValueError(f"Expected parameter name, got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+            self._out_append(_IDENTIFIER_XML % self.tokenizer.identifier())
             self.tokenizer.advance()
         
-        self.output.write("</parameterList>\n")
+        self._out_append("</parameterList>\n")
 
     def compile_var_dec(self) -> None:
         """Compiles a var declaration.
@@ -202,10 +243,10 @@ class CompilationEngine:
                 self.tokenizer.keyword() == "VAR"):
             return
         
-        self.output.write("<varDec>\n")
+        self._out_append("<varDec>\n")
         
         # Parse 'var' keyword
-        self.output.write(f"<keyword> var </keyword>\n")
+        self._out_append("<keyword> var </keyword>\n")
         self.tokenizer.advance()
         
         # Parse type
@@ -215,11 +256,11 @@ class CompilationEngine:
         while True:
             if self.tokenizer.token_type() != "IDENTIFIER":
                 raise ValueError(f"Expected identifier, got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+            self._out_append(_IDENTIFIER_XML % self.tokenizer.identifier())
             self.tokenizer.advance()
             
             if self.tokenizer.current_token == ",":
-                self.output.write(f"<symbol> , </symbol>\n")
+                self._out_append("<symbol> , </symbol>\n")
                 self.tokenizer.advance()
             else:
                 break
@@ -227,20 +268,20 @@ class CompilationEngine:
         # Expect ';'
         if self.tokenizer.current_token != ";":
             raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
+        self._out_append("<symbol> ; </symbol>\n")
         self.tokenizer.advance()
         
-        self.output.write("</varDec>\n")
+        self._out_append("</varDec>\n")
 
     def compile_statements(self) -> None:
         """Compiles a sequence of statements, not including the enclosing 
         "{}".
         Grammar: statement*
         """
-        self.output.write("<statements>\n")
+        self._out_append("<statements>\n")
         
         while (self.tokenizer.token_type() == "KEYWORD" and 
-               self.tokenizer.keyword() in ["LET", "IF", "WHILE", "DO", "RETURN"]):
+               self.tokenizer.keyword() in _STATEMENT_KEYWORDS):
             if self.tokenizer.keyword() == "LET":
                 self.compile_let()
             elif self.tokenizer.keyword() == "IF":
@@ -252,7 +293,7 @@ class CompilationEngine:
             elif self.tokenizer.keyword() == "RETURN":
                 self.compile_return()
         
-        self.output.write("</statements>\n")
+        self._out_append("</statements>\n")
 
     def compile_do(self) -> None:
         """Compiles a do statement.
@@ -262,54 +303,54 @@ class CompilationEngine:
                 self.tokenizer.keyword() == "DO"):
             return
         
-        self.output.write("<doStatement>\n")
+        self._out_append("<doStatement>\n")
         
         # 1. 'do' keyword
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        self._out_append(_KEYWORD_XML[self.tokenizer.current_token])
         self.tokenizer.advance()
         
         # 2. subroutineCall logic
         # Expect Identifier (className | varName | subroutineName)
         if self.tokenizer.token_type() != "IDENTIFIER":
             raise ValueError(f"Expected identifier in do statement, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+        self._out_append(_IDENTIFIER_XML % self.tokenizer.identifier())
         self.tokenizer.advance()
         
         # Check for '.' (method call like Game.run)
         if self.tokenizer.current_token == ".":
-            self.output.write(f"<symbol> . </symbol>\n")
+            self._out_append("<symbol> . </symbol>\n")
             self.tokenizer.advance()
             
             # Expect subroutineName
             if self.tokenizer.token_type() != "IDENTIFIER":
                 raise ValueError(f"Expected subroutine name after '.', got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+            self._out_append(_IDENTIFIER_XML % self.tokenizer.identifier())
             self.tokenizer.advance()
         
         # Expect '('
         if self.tokenizer.current_token != "(":
             raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
+        self._out_append("<symbol> ( </symbol>\n")
         self.tokenizer.advance()
         
         # 3. Compile expression list
-        self.output.write("<expressionList>\n")
+        self._out_append("<expressionList>\n")
         self.compile_expression_list()
-        self.output.write("</expressionList>\n")
+        self._out_append("</expressionList>\n")
         
         # Expect ')'
         if self.tokenizer.current_token != ")":
             raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
+        self._out_append("<symbol> ) </symbol>\n")
         self.tokenizer.advance()
         
         # 4. Expect ';'
         if self.tokenizer.current_token != ";":
             raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
+        self._out_append("<symbol> ; </symbol>\n")
         self.tokenizer.advance()
         
-        self.output.write("</doStatement>\n")
+        self._out_append("</doStatement>\n")
     
     def compile_let(self) -> None:
         """Compiles a let statement.
@@ -319,30 +360,30 @@ class CompilationEngine:
                 self.tokenizer.keyword() == "LET"):
             return
         
-        self.output.write("<letStatement>\n")
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        self._out_append("<letStatement>\n")
+        self._out_append(_KEYWORD_XML[self.tokenizer.current_token])
         self.tokenizer.advance()
         
         # Expect varName
         if self.tokenizer.token_type() != "IDENTIFIER":
             raise ValueError(f"Expected variable name, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+        self._out_append(_IDENTIFIER_XML % self.tokenizer.identifier())
         self.tokenizer.advance()
         
         # Handle optional array subscript: '[' expression ']'
         if self.tokenizer.current_token == "[":
-            self.output.write(f"<symbol> [ </symbol>\n")
+            self._out_append("<symbol> [ </symbol>\n")
             self.tokenizer.advance()
             self.compile_expression()
             if self.tokenizer.current_token != "]":
                 raise ValueError(f"Expected ']', got {self.tokenizer.current_token}")
-            self.output.write(f"<symbol> ] </symbol>\n")
+            self._out_append("<symbol> ] </symbol>\n")
             self.tokenizer.advance()
         
         # Expect '='
         if self.tokenizer.current_token != "=":
             raise ValueError(f"Expected '=', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> = </symbol>\n")
+        self._out_append("<symbol> = </symbol>\n")
         self.tokenizer.advance()
         
         # Expect expression
@@ -351,10 +392,10 @@ class CompilationEngine:
         # Expect ';'
         if self.tokenizer.current_token != ";":
             raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
+        self._out_append("<symbol> ; </symbol>\n")
         self.tokenizer.advance()
         
-        self.output.write("</letStatement>\n")
+        self._out_append("</letStatement>\n")
 
     def compile_while(self) -> None:
         """Compiles a while statement.
@@ -364,14 +405,14 @@ class CompilationEngine:
                 self.tokenizer.keyword() == "WHILE"):
             return
         
-        self.output.write("<whileStatement>\n")
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        self._out_append("<whileStatement>\n")
+        self._out_append(_KEYWORD_XML[self.tokenizer.current_token])
         self.tokenizer.advance()
         
         # Expect '('
         if self.tokenizer.current_token != "(":
             raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
+        self._out_append("<symbol> ( </symbol>\n")
         self.tokenizer.advance()
         
         # Parse expression
@@ -380,13 +421,13 @@ class CompilationEngine:
         # Expect ')'
         if self.tokenizer.current_token != ")":
             raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
+        self._out_append("<symbol> ) </symbol>\n")
         self.tokenizer.advance()
         
         # Expect '{'
         if self.tokenizer.current_token != "{":
             raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> {{ </symbol>\n")
+        self._out_append("<symbol> { </symbol>\n")
         self.tokenizer.advance()
         
         # Parse statements
@@ -395,10 +436,10 @@ class CompilationEngine:
         # Expect '}'
         if self.tokenizer.current_token != "}":
             raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> }} </symbol>\n")
+        self._out_append("<symbol> } </symbol>\n")
         self.tokenizer.advance()
         
-        self.output.write("</whileStatement>\n")
+        self._out_append("</whileStatement>\n")
 
     def compile_return(self) -> None:
         """Compiles a return statement.
@@ -408,8 +449,8 @@ class CompilationEngine:
                 self.tokenizer.keyword() == "RETURN"):
             return
         
-        self.output.write("<returnStatement>\n")
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        self._out_append("<returnStatement>\n")
+        self._out_append(_KEYWORD_XML[self.tokenizer.current_token])
         self.tokenizer.advance()
         
         # Parse optional expression
@@ -419,10 +460,10 @@ class CompilationEngine:
         # Expect ';'
         if self.tokenizer.current_token != ";":
             raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
+        self._out_append("<symbol> ; </symbol>\n")
         self.tokenizer.advance()
         
-        self.output.write("</returnStatement>\n")
+        self._out_append("</returnStatement>\n")
 
     def compile_if(self) -> None:
         """Compiles an if statement, possibly with a trailing else clause.
@@ -432,14 +473,14 @@ class CompilationEngine:
                 self.tokenizer.keyword() == "IF"):
             return
         
-        self.output.write("<ifStatement>\n")
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        self._out_append("<ifStatement>\n")
+        self._out_append(_KEYWORD_XML[self.tokenizer.current_token])
         self.tokenizer.advance()
         
         # Expect '('
         if self.tokenizer.current_token != "(":
             raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
+        self._out_append("<symbol> ( </symbol>\n")
         self.tokenizer.advance()
         
         # Parse expression
@@ -448,13 +489,13 @@ class CompilationEngine:
         # Expect ')'
         if self.tokenizer.current_token != ")":
             raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
+        self._out_append("<symbol> ) </symbol>\n")
         self.tokenizer.advance()
         
         # Expect '{'
         if self.tokenizer.current_token != "{":
             raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> {{ </symbol>\n")
+        self._out_append("<symbol> { </symbol>\n")
         self.tokenizer.advance()
         
         # Parse statements
@@ -463,19 +504,19 @@ class CompilationEngine:
         # Expect '}'
         if self.tokenizer.current_token != "}":
             raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> }} </symbol>\n")
+        self._out_append("<symbol> } </symbol>\n")
         self.tokenizer.advance()
         
         # Handle optional else clause
         if (self.tokenizer.token_type() == "KEYWORD" and 
             self.tokenizer.keyword() == "ELSE"):
-            self.output.write(f"<keyword> else </keyword>\n")
+            self._out_append("<keyword> else </keyword>\n")
             self.tokenizer.advance()
             
             # Expect '{'
             if self.tokenizer.current_token != "{":
                 raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-            self.output.write(f"<symbol> {{ </symbol>\n")
+            self._out_append("<symbol> { </symbol>\n")
             self.tokenizer.advance()
             
             # Parse statements
@@ -484,10 +525,10 @@ class CompilationEngine:
             # Expect '}'
             if self.tokenizer.current_token != "}":
                 raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-            self.output.write(f"<symbol> }} </symbol>\n")
+            self._out_append("<symbol> } </symbol>\n")
             self.tokenizer.advance()
         
-        self.output.write("</ifStatement>\n")
+        self._out_append("</ifStatement>\n")
                             
 
     def compile_expression(self) -> None:
@@ -495,23 +536,22 @@ class CompilationEngine:
         Grammar: term (op term)*
         """
         # Check if we have content for an expression
-        if self.tokenizer.current_token in [';', ']', ')', ',']:
+        if self.tokenizer.current_token in _EXPRESSION_END:
             return
         
-        self.output.write("<expression>\n")
+        self._out_append("<expression>\n")
         
         # Parse first term
         self.compile_term()
         
         # Parse (op term)* - zero or more operators followed by terms
         while (self.tokenizer.token_type() == "SYMBOL" and 
-               self.tokenizer.symbol() in ["+", "-", "*", "/", "&", "|", "<", ">", "="]):
-            # ESCAPE XML HERE
-            self.output.write(f"<symbol> {self._escape_xml(self.tokenizer.symbol())} </symbol>\n")
+               self.tokenizer.symbol() in _OPS):
+            self._out_append(_SYMBOL_XML[self.tokenizer.symbol()])
             self.tokenizer.advance()
             self.compile_term()
         
-        self.output.write("</expression>\n")
+        self._out_append("</expression>\n")
 
     def compile_term(self) -> None:
         """Compiles a term.
@@ -519,94 +559,95 @@ class CompilationEngine:
                  varName '[' expression ']' | subroutineCall | 
                  '(' expression ')' | unaryOp term
         """
-        self.output.write("<term>\n")
+        self._out_append("<term>\n")
         
         # Handle unary operators: unaryOp term
-        if self.tokenizer.token_type() == "SYMBOL" and self.tokenizer.symbol() in ["-", "~", "^", "#"]:
-            self.output.write(f"<symbol> {self.tokenizer.symbol()} </symbol>\n")
+        # Each unary operator opens a nested <term>. They are emitted in a loop
+        # rather than by recursion, and all closed after the base term.
+        open_terms = 1
+        while self.tokenizer.token_type() == "SYMBOL" and self.tokenizer.symbol() in _UNARY_OPS:
+            self._out_append(_SYMBOL_XML[self.tokenizer.symbol()])
+            self._out_append("<term>\n")
             self.tokenizer.advance()
-            # Recursively compile the term after unary operator
-            self.compile_term()
-            self.output.write("</term>\n")
-            return
+            open_terms += 1
         
         # Handle parenthesized expression: '(' expression ')'
         if self.tokenizer.token_type() == "SYMBOL" and self.tokenizer.symbol() == "(":
-            self.output.write(f"<symbol> ( </symbol>\n")
+            self._out_append("<symbol> ( </symbol>\n")
             self.tokenizer.advance()
             self.compile_expression()
             if self.tokenizer.current_token != ")":
                 raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-            self.output.write(f"<symbol> ) </symbol>\n")
+            self._out_append("<symbol> ) </symbol>\n")
             self.tokenizer.advance()
-            self.output.write("</term>\n")
+            self._out_append("</term>\n" * open_terms)
             return
         
         # Handle integer constant
         if self.tokenizer.token_type() == "INT_CONST":
-            self.output.write(f"<integerConstant> {self.tokenizer.int_val()} </integerConstant>\n")
+            self._out_append(_INT_CONST_XML % self.tokenizer.int_val())
             self.tokenizer.advance()
-            self.output.write("</term>\n")
+            self._out_append("</term>\n" * open_terms)
             return
         
         # Handle string constant
         if self.tokenizer.token_type() == "STRING_CONST":
             # ESCAPE XML HERE
-            self.output.write(f"<stringConstant> {self._escape_xml(self.tokenizer.string_val())} </stringConstant>\n")
+            self._out_append(_STRING_CONST_XML % self._escape_xml(self.tokenizer.string_val()))
             self.tokenizer.advance()
-            self.output.write("</term>\n")
+            self._out_append("</term>\n" * open_terms)
             return
         
         # Handle keyword constant (true, false, null, this)
-        if self.tokenizer.token_type() == "KEYWORD" and self.tokenizer.keyword().lower() in ["true", "false", "null", "this"]:
-            self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        if self.tokenizer.token_type() == "KEYWORD" and self.tokenizer.current_token in _KEYWORD_CONSTANTS:
+            self._out_append(_KEYWORD_XML[self.tokenizer.current_token])
             self.tokenizer.advance()
-            self.output.write("</term>\n")
+            self._out_append("</term>\n" * open_terms)
             return
         
         # Handle identifier: varName, varName '[' expression ']', or subroutineCall
         if self.tokenizer.token_type() == "IDENTIFIER":
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+            self._out_append(_IDENTIFIER_XML % self.tokenizer.identifier())
             self.tokenizer.advance()
             
             # Array subscript: varName '[' expression ']'
             if self.tokenizer.current_token == "[":
-                self.output.write(f"<symbol> [ </symbol>\n")
+                self._out_append("<symbol> [ </symbol>\n")
                 self.tokenizer.advance()
                 self.compile_expression()
                 if self.tokenizer.current_token != "]":
                      raise ValueError(f"Expected ']', got {self.tokenizer.current_token}")
-                self.output.write(f"<symbol> ] </symbol>\n")
+                self._out_append("<symbol> ] </symbol>\n")
                 self.tokenizer.advance()
             
             # Subroutine call: . or (
             elif self.tokenizer.current_token == "." or self.tokenizer.current_token == "(":
                  if self.tokenizer.current_token == ".":
-                     self.output.write(f"<symbol> . </symbol>\n")
+                     self._out_append("<symbol> . </symbol>\n")
                      self.tokenizer.advance()
                      if self.tokenizer.token_type() != "IDENTIFIER":
                          raise ValueError(f"Expected subroutine name, got {self.tokenizer.current_token}")
-                     self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+                     self._out_append(_IDENTIFIER_XML % self.tokenizer.identifier())
                      self.tokenizer.advance()
                 
                  if self.tokenizer.current_token != "(":
                      raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-                 self.output.write(f"<symbol> ( </symbol>\n")
+                 self._out_append("<symbol> ( </symbol>\n")
                  self.tokenizer.advance()
                 
-                 self.output.write("<expressionList>\n")
+                 self._out_append("<expressionList>\n")
                  self.compile_expression_list()
-                 self.output.write("</expressionList>\n")
+                 self._out_append("</expressionList>\n")
                 
                  if self.tokenizer.current_token != ")":
                      raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-                 self.output.write(f"<symbol> ) </symbol>\n")
+                 self._out_append("<symbol> ) </symbol>\n")
                  self.tokenizer.advance()
 
-            self.output.write("</term>\n")
+            self._out_append("</term>\n" * open_terms)
             return
         
-        self.output.write("</term>\n")
+        self._out_append("</term>\n" * open_terms)
         raise ValueError(f"Expected term, got {self.tokenizer.current_token}")
     
     def compile_expression_list(self) -> None:
@@ -622,7 +663,7 @@ class CompilationEngine:
         
         # Parse additional expressions
         while self.tokenizer.current_token == ",":
-            self.output.write(f"<symbol> , </symbol>\n")
+            self._out_append("<symbol> , </symbol>\n")
             self.tokenizer.advance()
             self.compile_expression()
 
@@ -633,8 +674,8 @@ class CompilationEngine:
         if self.tokenizer.current_token != "{":
             raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
         
-        self.output.write("<subroutineBody>\n")
-        self.output.write(f"<symbol> {{ </symbol>\n")
+        self._out_append("<subroutineBody>\n")
+        self._out_append("<symbol> { </symbol>\n")
         self.tokenizer.advance()
         
         # Parse varDec* (zero or more)
@@ -648,19 +689,19 @@ class CompilationEngine:
         # Parse '}'
         if self.tokenizer.current_token != "}":
             raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> }} </symbol>\n")
+        self._out_append("<symbol> } </symbol>\n")
         self.tokenizer.advance()
         
-        self.output.write("</subroutineBody>\n")
+        self._out_append("</subroutineBody>\n")
 
     def _parse_type(self) -> None:
         """Helper method to parse a type (int | char | boolean | className)."""
         if self.tokenizer.token_type() == "KEYWORD" and \
-           self.tokenizer.keyword() in ["INT", "CHAR", "BOOLEAN"]:
-            self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+           self.tokenizer.keyword() in _PRIMITIVE_TYPE_KEYWORDS:
+            self._out_append(_KEYWORD_XML[self.tokenizer.current_token])
             self.tokenizer.advance()
         elif self.tokenizer.token_type() == "IDENTIFIER":
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+            self._out_append(_IDENTIFIER_XML % self.tokenizer.identifier())
             self.tokenizer.advance()
         else:
             raise ValueError(f"Expected type, got {self.tokenizer.current_token}")
\ No newline at end of file
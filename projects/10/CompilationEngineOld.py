@@ -5,7 +5,66 @@ was written by Aviv Yaish. It is an extension to the specifications given
 as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import sys
 import typing
+from JackTokenizer import (
+    JackTokenizer, KeywordIds, KW_CLASS, KW_CONSTRUCTOR, KW_FUNCTION,
+    KW_METHOD, KW_INT, KW_CHAR, KW_BOOLEAN, KW_VOID, KW_VAR, KW_STATIC,
+    KW_FIELD, KW_LET, KW_DO, KW_IF, KW_ELSE, KW_WHILE, KW_RETURN, KW_TRUE,
+    KW_FALSE, KW_NULL, KW_THIS, TT_IDENTIFIER, TT_INT_CONST, TT_STRING_CONST)
+
+
+# Fixed symbols, interned so that the parser can compare them by identity.
+# JackTokenizer interns every token it produces.
+_LBRACE = sys.intern("{")
+_RBRACE = sys.intern("}")
+_LPAREN = sys.intern("(")
+_RPAREN = sys.intern(")")
+_LBRACKET = sys.intern("[")
+_RBRACKET = sys.intern("]")
+_DOT = sys.intern(".")
+_COMMA = sys.intern(",")
+_SEMICOLON = sys.intern(";")
+_EQUALS = sys.intern("=")
+
+_OPS = frozenset(("+", "-", "*", "/", "&", "|", "<", ">", "="))
+_UNARY_OPS = frozenset(("-", "~", "^", "#"))
+_EXPRESSION_END = frozenset((";", "]", ")", ","))
+_KEYWORD_CONSTANTS = frozenset((KW_TRUE, KW_FALSE, KW_NULL, KW_THIS))
+
+# Fixed halves of the XML elements wrapped around variable token text.
+_IDENTIFIER_OPEN = "<identifier> "
+_IDENTIFIER_CLOSE = " </identifier>\n"
+_INT_CONST_OPEN = "<integerConstant> "
+_INT_CONST_CLOSE = " </integerConstant>\n"
+_STRING_CONST_OPEN = "<stringConstant> "
+_STRING_CONST_CLOSE = " </stringConstant>\n"
+
+# Characters that must be escaped in XML text.
+_XML_ESCAPE = str.maketrans({"<": "&lt;", ">": "&gt;", "&": "&amp;"})
+
+# Complete, pre-escaped <symbol> elements for every Jack symbol, so that
+# symbols read from the input need no formatting or escaping when written.
+_SYMBOL_XML = {
+    symbol: f"<symbol> {symbol.translate(_XML_ESCAPE)} </symbol>\n"
+    for symbol in "{}()[].,;+-*/&|<>=~^#"}
+_OP_XML = {op: _SYMBOL_XML[op] for op in _OPS}
+
+# Complete <keyword> elements, keyed by KW_* id.
+_KEYWORD_XML = {kw: f"<keyword> {keyword} </keyword>\n"
+                for keyword, kw in KeywordIds.items()}
+
+# Opening tag together with the leading keyword, for declarations that can
+# start with more than one keyword.
+_CLASS_VAR_DEC_OPEN = {
+    KW_STATIC: "<classVarDec>\n<keyword> static </keyword>\n",
+    KW_FIELD: "<classVarDec>\n<keyword> field </keyword>\n",
+}
+_SUBROUTINE_DEC_OPEN = {
+    KW_CONSTRUCTOR: "<subroutineDec>\n<keyword> constructor </keyword>\n",
+    KW_FUNCTION: "<subroutineDec>\n<keyword> function </keyword>\n",
+    KW_METHOD: "<subroutineDec>\n<keyword> method </keyword>\n",
+}
 
 
 class CompilationEngine:
@@ -13,7 +72,12 @@ class CompilationEngine:
     output stream.
     """
 
-    def __init__(self, input_stream: "JackTokenizer", output_stream) -> None:
+    # Fixed attribute layout: the engine is instantiated once per file and
+    # its attributes are read on every token.
+    __slots__ = ("tokenizer", "output", "_buf", "_write", "_stmt_table")
+
+    def __init__(self, input_stream: JackTokenizer,
+                 output_stream: typing.TextIO) -> None:
         """
         Creates a new compilation engine with the given input and output. The
         next routine called must be compileClass()
@@ -23,89 +87,75 @@ class CompilationEngine:
         # Your code goes here!
         # Note that you can write to output_stream like so:
         # output_stream.write("Hello world! \n")
-        self.tokenizer = input_stream
-        self.output = output_stream
+        self.tokenizer: JackTokenizer = input_stream
+        self.output: typing.TextIO = output_stream
+        # XML fragments are collected here and written out in one call at
+        # the end of compile_class.
+        self._buf: typing.List[str] = []
+        self._write = self._buf.append
+        # Statement compilers keyed by the keyword id that starts them.
+        self._stmt_table = {
+            KW_LET: self.compile_let,
+            KW_IF: self.compile_if,
+            KW_WHILE: self.compile_while,
+            KW_DO: self.compile_do,
+            KW_RETURN: self.compile_return,
+        }
 
     def compile_class(self) -> None:
         """Compiles a complete class.
         Grammar: 'class' className '{' classVarDec* subroutineDec* '}'
         """
         # Expect 'class' keyword
-        if self.tokenizer.token_type() != "KEYWORD" or self.tokenizer.keyword() != "CLASS":
+        if self.tokenizer.current_kw != KW_CLASS:
             raise ValueError(f"Expected 'class', got {self.tokenizer.current_token}")
         
-        self.output.write("<class>\n")
-        self.output.write(f"<keyword> class </keyword>\n")
+        self._write("<class>\n<keyword> class </keyword>\n")
         self.tokenizer.advance()
         
         # Expect className (identifier)
-        if self.tokenizer.token_type() != "IDENTIFIER":
+        if self.tokenizer.current_type != TT_IDENTIFIER:
             raise ValueError(f"Expected className, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+        self._emit(_IDENTIFIER_OPEN, self.tokenizer.identifier(), _IDENTIFIER_CLOSE)
         self.tokenizer.advance()
         
         # Expect '{'
-        if self.tokenizer.current_token != "{":
-            raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> {{ </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_LBRACE)
         
         # Parse classVarDec* (zero or more)
-        while (self.tokenizer.token_type() == "KEYWORD" and 
-               self.tokenizer.keyword() in ["STATIC", "FIELD"]):
+        kw = self.tokenizer.current_kw
+        while kw == KW_STATIC or kw == KW_FIELD:
             self.compile_class_var_dec()
+            kw = self.tokenizer.current_kw
         
         # Parse subroutineDec* (zero or more)
-        while (self.tokenizer.token_type() == "KEYWORD" and 
-               self.tokenizer.keyword() in ["CONSTRUCTOR", "FUNCTION", "METHOD"]):
+        while kw == KW_CONSTRUCTOR or kw == KW_FUNCTION or kw == KW_METHOD:
             self.compile_subroutine()
+            kw = self.tokenizer.current_kw
         
         # Expect '}'
-        if self.tokenizer.current_token != "}":
-            raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> }} </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_RBRACE)
         
-        self.output.write("</class>\n")
+        self._write("</class>\n")
+        self.output.write("".join(self._buf))
+        self._buf.clear()
         
 
     def compile_class_var_dec(self) -> None:
         """Compiles a static declaration or a field declaration.
         Grammar: ('static' | 'field') type varName (',' varName)* ';'
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() in ["STATIC", "FIELD"]):
-            return
-        
-        self.output.write("<classVarDec>\n")
-        
-        # Parse 'static' or 'field'
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        # Open the element and parse 'static' or 'field'
+        self._write(_CLASS_VAR_DEC_OPEN[self.tokenizer.current_kw])
         self.tokenizer.advance()
         
         # Parse type
         self._parse_type()
         
-        # Parse varName (',' varName)*
-        while True:
-            if self.tokenizer.token_type() != "IDENTIFIER":
-                raise ValueError(f"Expected identifier, got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-            self.tokenizer.advance()
-            
-            if self.tokenizer.current_token == ",":
-                self.output.write(f"<symbol> , </symbol>\n")
-                self.tokenizer.advance()
-            else:
-                break
+        # Parse varName (',' varName)* ';'
+        self._parse_name_list()
         
-        # Expect ';'
-        if self.tokenizer.current_token != ";":
-            raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
-        self.tokenizer.advance()
-        
-        self.output.write("</classVarDec>\n")
+        self._write("</classVarDec>\n")
 
     def compile_subroutine(self) -> None:
         """
@@ -115,402 +165,272 @@ class CompilationEngine:
         You can assume that classes with constructors have at least one field,
         you will understand why this is necessary in project 11.
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() in ["CONSTRUCTOR", "FUNCTION", "METHOD"]):
-            return
-        
-        self.output.write("<subroutineDec>\n")
-        
-        # Parse 'constructor', 'function', or 'method'
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        # Open the element and parse 'constructor', 'function', or 'method'
+        self._write(_SUBROUTINE_DEC_OPEN[self.tokenizer.current_kw])
         self.tokenizer.advance()
         
         # Parse return type ('void' or type)
-        if self.tokenizer.token_type() == "KEYWORD" and self.tokenizer.keyword() == "VOID":
-            self.output.write(f"<keyword> void </keyword>\n")
+        if self.tokenizer.current_kw == KW_VOID:
+            self._write("<keyword> void </keyword>\n")
             self.tokenizer.advance()
         else:
             self._parse_type()
         
         # Parse subroutineName (identifier)
-        if self.tokenizer.token_type() != "IDENTIFIER":
+        if self.tokenizer.current_type != TT_IDENTIFIER:
             raise ValueError(f"Expected subroutine name, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+        self._emit(_IDENTIFIER_OPEN, self.tokenizer.identifier(), _IDENTIFIER_CLOSE)
         self.tokenizer.advance()
         
         # Parse '('
-        if self.tokenizer.current_token != "(":
-            raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_LPAREN)
         
         # Parse parameterList
         self.compile_parameter_list()
         
         # Parse ')'
-        if self.tokenizer.current_token != ")":
-            raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_RPAREN)
         
         # Parse subroutineBody
         self.compile_subroutine_body()
         
-        self.output.write("</subroutineDec>\n")
+        self._write("</subroutineDec>\n")
 
     def compile_parameter_list(self) -> None:
         """Compiles a (possibly empty) parameter list, not including the 
         enclosing "()".
         Grammar: ((type varName) (',' type varName)*)?
         """
-        self.output.write("<parameterList>\n")
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._write
+        emit = self._emit
+
+        write("<parameterList>\n")
         
         # Check if parameter list is empty
-        if self.tokenizer.current_token == ")":
-            self.output.write("</parameterList>\n")
+        if tokenizer.current_token is _RPAREN:
+            write("</parameterList>\n")
             return
         
         # Parse first parameter
         self._parse_type()
         
-        if self.tokenizer.token_type() != "IDENTIFIER":
-            raise ValueError(f"Expected parameter name, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-        self.tokenizer.advance()
+        if tokenizer.current_type != TT_IDENTIFIER:
+            raise ValueError(f"Expected parameter name, got {tokenizer.current_token}")
+        emit(_IDENTIFIER_OPEN, tokenizer.identifier(), _IDENTIFIER_CLOSE)
         
         # Parse additional parameters
-        while self.tokenizer.current_token == ",":
-            self.output.write(f"<symbol> , </symbol>\n")
-            self.tokenizer.advance()
+        while advance() is _COMMA:
+            write("<symbol> , </symbol>\n")
+            advance()
             
             self._parse_type()
             
-            if self.tokenizer.token_type() != "IDENTIFIER":
-                raise ValueError(f"Expected parameter name, got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-            self.tokenizer.advance()
+            if tokenizer.current_type != TT_IDENTIFIER:
+                raise ValueError(f"Expected parameter name, got {tokenizer.current_token}")
+            emit(_IDENTIFIER_OPEN, tokenizer.identifier(), _IDENTIFIER_CLOSE)
         
-        self.output.write("</parameterList>\n")
+        write("</parameterList>\n")
 
     def compile_var_dec(self) -> None:
         """Compiles a var declaration.
         Grammar: 'var' type varName (',' varName)* ';'
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() == "VAR"):
-            return
-        
-        self.output.write("<varDec>\n")
-        
-        # Parse 'var' keyword
-        self.output.write(f"<keyword> var </keyword>\n")
+        # Open the element and parse 'var' keyword
+        self._write("<varDec>\n<keyword> var </keyword>\n")
         self.tokenizer.advance()
         
         # Parse type
         self._parse_type()
         
-        # Parse varName (',' varName)*
-        while True:
-            if self.tokenizer.token_type() != "IDENTIFIER":
-                raise ValueError(f"Expected identifier, got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-            self.tokenizer.advance()
-            
-            if self.tokenizer.current_token == ",":
-                self.output.write(f"<symbol> , </symbol>\n")
-                self.tokenizer.advance()
-            else:
-                break
+        # Parse varName (',' varName)* ';'
+        self._parse_name_list()
         
-        # Expect ';'
-        if self.tokenizer.current_token != ";":
-            raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
-        self.tokenizer.advance()
-        
-        self.output.write("</varDec>\n")
+        self._write("</varDec>\n")
 
     def compile_statements(self) -> None:
         """Compiles a sequence of statements, not including the enclosing 
         "{}".
         Grammar: statement*
         """
-        self.output.write("<statements>\n")
-        
-        while (self.tokenizer.token_type() == "KEYWORD" and 
-               self.tokenizer.keyword() in ["LET", "IF", "WHILE", "DO", "RETURN"]):
-            if self.tokenizer.keyword() == "LET":
-                self.compile_let()
-            elif self.tokenizer.keyword() == "IF":
-                self.compile_if()
-            elif self.tokenizer.keyword() == "WHILE":
-                self.compile_while()
-            elif self.tokenizer.keyword() == "DO":
-                self.compile_do()
-            elif self.tokenizer.keyword() == "RETURN":
-                self.compile_return()
-        
-        self.output.write("</statements>\n")
+        tokenizer = self.tokenizer
+        write = self._write
+
+        write("<statements>\n")
+        
+        stmt_table = self._stmt_table
+        while True:
+            compile_statement = stmt_table.get(tokenizer.current_kw)
+            if compile_statement is None:
+                break
+            compile_statement()
+        
+        write("</statements>\n")
 
     def compile_do(self) -> None:
         """Compiles a do statement.
         Grammar: 'do' subroutineCall ';'
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() == "DO"):
-            return
-        
-        self.output.write("<doStatement>\n")
-        
         # 1. 'do' keyword
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        self._write("<doStatement>\n<keyword> do </keyword>\n")
         self.tokenizer.advance()
         
-        # 2. subroutineCall logic
-        # Expect Identifier (className | varName | subroutineName)
-        if self.tokenizer.token_type() != "IDENTIFIER":
-            raise ValueError(f"Expected identifier in do statement, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-        self.tokenizer.advance()
+        # 2. subroutineCall
+        self.compile_subroutine_call()
         
-        # Check for '.' (method call like Game.run)
-        if self.tokenizer.current_token == ".":
-            self.output.write(f"<symbol> . </symbol>\n")
-            self.tokenizer.advance()
-            
-            # Expect subroutineName
-            if self.tokenizer.token_type() != "IDENTIFIER":
-                raise ValueError(f"Expected subroutine name after '.', got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-            self.tokenizer.advance()
+        # 3. Expect ';'
+        self._expect_symbol(_SEMICOLON)
         
-        # Expect '('
-        if self.tokenizer.current_token != "(":
-            raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
-        self.tokenizer.advance()
-        
-        # 3. Compile expression list
-        # Note: We must manually write the tags because compile_expression_list 
-        # in your code doesn't write the opening/closing tags itself.
-        self.output.write("<expressionList>\n")
-        self.compile_expression_list()
-        self.output.write("</expressionList>\n")
-        
-        # Expect ')'
-        if self.tokenizer.current_token != ")":
-            raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
-        self.tokenizer.advance()
-        
-        # 4. Expect ';'
-        if self.tokenizer.current_token != ";":
-            raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
-        self.tokenizer.advance()
-        
-        self.output.write("</doStatement>\n")
+        self._write("</doStatement>\n")
     
     def compile_let(self) -> None:
         """Compiles a let statement.
         Grammar: 'let' varName ('[' expression ']')? '=' expression ';'
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() == "LET"):
-            return
-        
-        self.output.write("<letStatement>\n")
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        self._write("<letStatement>\n<keyword> let </keyword>\n")
         self.tokenizer.advance()
         
         # Expect varName
-        if self.tokenizer.token_type() != "IDENTIFIER":
+        if self.tokenizer.current_type != TT_IDENTIFIER:
             raise ValueError(f"Expected variable name, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-        self.tokenizer.advance()
+        self._emit(_IDENTIFIER_OPEN, self.tokenizer.identifier(), _IDENTIFIER_CLOSE)
         
         # Handle optional array subscript: '[' expression ']'
-        if self.tokenizer.current_token == "[":
-            self.output.write(f"<symbol> [ </symbol>\n")
+        if self.tokenizer.advance() is _LBRACKET:
+            self._write("<symbol> [ </symbol>\n")
             self.tokenizer.advance()
             self.compile_expression()
-            if self.tokenizer.current_token != "]":
-                raise ValueError(f"Expected ']', got {self.tokenizer.current_token}")
-            self.output.write(f"<symbol> ] </symbol>\n")
-            self.tokenizer.advance()
+            self._expect_symbol(_RBRACKET)
         
         # Expect '='
-        if self.tokenizer.current_token != "=":
-            raise ValueError(f"Expected '=', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> = </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_EQUALS)
         
         # Expect expression
         self.compile_expression()
         
         # Expect ';'
-        if self.tokenizer.current_token != ";":
-            raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_SEMICOLON)
         
-        self.output.write("</letStatement>\n")
+        self._write("</letStatement>\n")
 
     def compile_while(self) -> None:
         """Compiles a while statement.
         Grammar: 'while' '(' expression ')' '{' statements '}'
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() == "WHILE"):
-            return
-        
-        self.output.write("<whileStatement>\n")
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        self._write("<whileStatement>\n<keyword> while </keyword>\n")
         self.tokenizer.advance()
         
         # Expect '('
-        if self.tokenizer.current_token != "(":
-            raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_LPAREN)
         
         # Parse expression
         self.compile_expression()
         
         # Expect ')'
-        if self.tokenizer.current_token != ")":
-            raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_RPAREN)
         
         # Expect '{'
-        if self.tokenizer.current_token != "{":
-            raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> {{ </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_LBRACE)
         
         # Parse statements
         self.compile_statements()
         
         # Expect '}'
-        if self.tokenizer.current_token != "}":
-            raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> }} </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_RBRACE)
         
-        self.output.write("</whileStatement>\n")
+        self._write("</whileStatement>\n")
 
     def compile_return(self) -> None:
         """Compiles a return statement.
         Grammar: 'return' expression? ';'
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() == "RETURN"):
-            return
-        
-        self.output.write("<returnStatement>\n")
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
-        self.tokenizer.advance()
+        self._write("<returnStatement>\n<keyword> return </keyword>\n")
         
         # Parse optional expression
-        if self.tokenizer.current_token != ";":
+        if self.tokenizer.advance() is not _SEMICOLON:
             self.compile_expression()
         
         # Expect ';'
-        if self.tokenizer.current_token != ";":
-            raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_SEMICOLON)
         
-        self.output.write("</returnStatement>\n")
+        self._write("</returnStatement>\n")
 
     def compile_if(self) -> None:
         """Compiles an if statement, possibly with a trailing else clause.
         Grammar: 'if' '(' expression ')' '{' statements '}' ('else' '{' statements '}')?
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() == "IF"):
-            return
-        
-        self.output.write("<ifStatement>\n")
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        self._write("<ifStatement>\n<keyword> if </keyword>\n")
         self.tokenizer.advance()
         
         # Expect '('
-        if self.tokenizer.current_token != "(":
-            raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_LPAREN)
         
         # Parse expression
         self.compile_expression()
         
         # Expect ')'
-        if self.tokenizer.current_token != ")":
-            raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_RPAREN)
         
         # Expect '{'
-        if self.tokenizer.current_token != "{":
-            raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> {{ </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_LBRACE)
         
         # Parse statements
         self.compile_statements()
         
         # Expect '}'
-        if self.tokenizer.current_token != "}":
-            raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> }} </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_RBRACE)
         
         # Handle optional else clause
-        if (self.tokenizer.token_type() == "KEYWORD" and 
-            self.tokenizer.keyword() == "ELSE"):
-            self.output.write(f"<keyword> else </keyword>\n")
+        if self.tokenizer.current_kw == KW_ELSE:
+            self._write("<keyword> else </keyword>\n")
             self.tokenizer.advance()
             
             # Expect '{'
-            if self.tokenizer.current_token != "{":
-                raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-            self.output.write(f"<symbol> {{ </symbol>\n")
-            self.tokenizer.advance()
+            self._expect_symbol(_LBRACE)
             
             # Parse statements
             self.compile_statements()
             
             # Expect '}'
-            if self.tokenizer.current_token != "}":
-                raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-            self.output.write(f"<symbol> }} </symbol>\n")
-            self.tokenizer.advance()
+            self._expect_symbol(_RBRACE)
         
-        self.output.write("</ifStatement>\n")
+        self._write("</ifStatement>\n")
                             
 
     def compile_expression(self) -> None:
         """Compiles an expression.
         Grammar: term (op term)*
         """
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._write
+        compile_term = self.compile_term
+
         # Check if we have content for an expression
-        if self.tokenizer.current_token in [';', ']', ')', ',']:
+        if tokenizer.current_token in _EXPRESSION_END:
             return
         
-        self.output.write("<expression>\n")
+        write("<expression>\n")
         
         # Parse first term
-        self.compile_term()
+        compile_term()
         
-        # Parse (op term)* - zero or more operators followed by terms
-        while (self.tokenizer.token_type() == "SYMBOL" and 
-               self.tokenizer.symbol() in ["+", "-", "*", "/", "&", "|", "<", ">", "="]):
-            self.output.write(f"<symbol> {self.tokenizer.symbol()} </symbol>\n")
-            self.tokenizer.advance()
-            self.compile_term()
+        # Most expressions are a single term: finish without entering the loop.
+        op_xml = _OP_XML.get(tokenizer.current_token)
+        if op_xml is None:
+            write("</expression>\n")
+            return
         
-        self.output.write("</expression>\n")
+        # Parse (op term)* - zero or more operators followed by terms
+        # A single lookup both recognizes the operator and yields its XML.
+        while op_xml is not None:
+            write(op_xml)
+            advance()
+            compile_term()
+            op_xml = _OP_XML.get(tokenizer.current_token)
+        
+        write("</expression>\n")
 
     def compile_term(self) -> None:
         """Compiles a term.
@@ -519,234 +439,211 @@ class CompilationEngine:
                  '(' expression ')' | unaryOp term
         """
         # UNCOMMENT THIS LINE:
-        self.output.write("<term>\n")  # <--- Turn this back on
+        self._write("<term>\n")  # <--- Turn this back on
         
         # Handle unary operators: unaryOp term
-        if self.tokenizer.token_type() == "SYMBOL" and self.tokenizer.symbol() in ["-", "~", "^", "#"]:
-            self.output.write(f"<symbol> {self.tokenizer.symbol()} </symbol>\n")
-            self.tokenizer.advance()
-            # Recursively compile the term after unary operator
-            self.compile_term()
-            # UNCOMMENT THIS LINE:
-            self.output.write("</term>\n") # <--- Turn this back on
-            return
-        
-        # Handle parenthesized expression: '(' expression ')'
-        if self.tokenizer.token_type() == "SYMBOL" and self.tokenizer.symbol() == "(":
-            self.output.write(f"<symbol> ( </symbol>\n")
-            self.tokenizer.advance()
-            self.compile_expression()
-            if self.tokenizer.current_token != ")":
-                raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-            self.output.write(f"<symbol> ) </symbol>\n")
-            self.tokenizer.advance()
-            # UNCOMMENT THIS LINE:
-            self.output.write("</term>\n") # <--- Turn this back on
-            return
-        
-        # Handle integer constant
-        if self.tokenizer.token_type() == "INT_CONST":
-            self.output.write(f"<integerConstant> {self.tokenizer.int_val()} </integerConstant>\n")
-            self.tokenizer.advance()
-            # UNCOMMENT THIS LINE:
-            self.output.write("</term>\n") # <--- Turn this back on
-            return
-        
-        # Handle string constant
-        if self.tokenizer.token_type() == "STRING_CONST":
-            self.output.write(f"<stringConstant> {self.tokenizer.string_val()} </stringConstant>\n")
-            self.tokenizer.advance()
-            # UNCOMMENT THIS LINE:
-            self.output.write("</term>\n") # <--- Turn this back on
-            return
-        
-        # Handle keyword constant (true, false, null, this)
-        if self.tokenizer.token_type() == "KEYWORD" and self.tokenizer.keyword().lower() in ["true", "false", "null", "this"]:
-            self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
-            self.tokenizer.advance()
-            # UNCOMMENT THIS LINE:
-            self.output.write("</term>\n") # <--- Turn this back on
-            return
-        
+        # Each unary operator opens a nested <term>. They are emitted in a loop
+        # rather than by recursion, and all closed after the base term.
+        tokenizer = self.tokenizer
+        cur = tokenizer.current_token
+        open_terms = 1
+        while cur in _UNARY_OPS:
+            self._buf.extend((_SYMBOL_XML[cur], "<term>\n"))
+            cur = tokenizer.advance()
+            open_terms += 1
+        
+        # The cases below are ordered by how often they occur in the project's
+        # Jack programs: identifiers, then integers, parentheses, keyword
+        # constants and strings.
+
         # Handle identifier: varName, varName '[' expression ']', or subroutineCall
-        if self.tokenizer.token_type() == "IDENTIFIER":
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-            self.tokenizer.advance()
+        if tokenizer.current_type == TT_IDENTIFIER:
+            self._emit(_IDENTIFIER_OPEN, tokenizer.identifier(), _IDENTIFIER_CLOSE)
+            cur = tokenizer.advance()
             
             # ... (Logic for array/subroutine calls) ...
-            if self.tokenizer.current_token == "[":
-                self.output.write(f"<symbol> [ </symbol>\n")
-                self.tokenizer.advance()
+            if cur is _LBRACKET:
+                self._write("<symbol> [ </symbol>\n")
+                tokenizer.advance()
                 self.compile_expression()
-                if self.tokenizer.current_token != "]":
-                     raise ValueError(f"Expected ']', got {self.tokenizer.current_token}")
-                self.output.write(f"<symbol> ] </symbol>\n")
-                self.tokenizer.advance()
-            elif self.tokenizer.current_token == "." or self.tokenizer.current_token == "(":
+                self._expect_symbol(_RBRACKET)
+            elif cur is _DOT or cur is _LPAREN:
                  # ... (Subroutine call logic) ...
-                 if self.tokenizer.current_token == ".":
-                     self.output.write(f"<symbol> . </symbol>\n")
-                     self.tokenizer.advance()
-                     if self.tokenizer.token_type() != "IDENTIFIER":
-                         raise ValueError(f"Expected subroutine name, got {self.tokenizer.current_token}")
-                     self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-                     self.tokenizer.advance()
+                 if cur is _DOT:
+                     self._write("<symbol> . </symbol>\n")
+                     tokenizer.advance()
+                     if tokenizer.current_type != TT_IDENTIFIER:
+                         raise ValueError(f"Expected subroutine name, got {tokenizer.current_token}")
+                     self._emit(_IDENTIFIER_OPEN, tokenizer.identifier(), _IDENTIFIER_CLOSE)
+                     tokenizer.advance()
                 
-                 if self.tokenizer.current_token != "(":
-                     raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-                 self.output.write(f"<symbol> ( </symbol>\n")
-                 self.tokenizer.advance()
+                 self._expect_symbol(_LPAREN)
                 
-                 self.output.write("<expressionList>\n")
+                 self._write("<expressionList>\n")
                  self.compile_expression_list()
-                 self.output.write("</expressionList>\n")
+                 self._write("</expressionList>\n")
                 
-                 if self.tokenizer.current_token != ")":
-                     raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-                 self.output.write(f"<symbol> ) </symbol>\n")
-                 self.tokenizer.advance()
-
+                 self._expect_symbol(_RPAREN)
+        
+        # Handle integer constant
+        elif tokenizer.current_type == TT_INT_CONST:
+            self._buf.extend((_INT_CONST_OPEN, str(tokenizer.int_val()),
+                              _INT_CONST_CLOSE))
+            tokenizer.advance()
+        
+        # Handle parenthesized expression: '(' expression ')'
+        elif cur is _LPAREN:
+            self._write("<symbol> ( </symbol>\n")
+            tokenizer.advance()
+            self.compile_expression()
+            self._expect_symbol(_RPAREN)
+        
+        # Handle keyword constant (true, false, null, this)
+        elif tokenizer.current_kw in _KEYWORD_CONSTANTS:
+            self._write(_KEYWORD_XML[tokenizer.current_kw])
+            tokenizer.advance()
+        
+        # Handle string constant
+        elif tokenizer.current_type == TT_STRING_CONST:
+            self._emit(_STRING_CONST_OPEN, tokenizer.string_val(), _STRING_CONST_CLOSE)
+            tokenizer.advance()
+        
+        else:
             # UNCOMMENT THIS LINE:
-            self.output.write("</term>\n") # <--- Turn this back on
-            return
+            self._write("</term>\n") # <--- Turn this back on
+            raise ValueError(f"Expected term, got {tokenizer.current_token}")
         
         # UNCOMMENT THIS LINE:
-        self.output.write("</term>\n") # <--- Turn this back on
-        raise ValueError(f"Expected term, got {self.tokenizer.current_token}")
+        self._buf.extend(("</term>\n",) * open_terms) # <--- Turn this back on
     
     def compile_expression_list(self) -> None:
         """Compiles a (possibly empty) comma-separated list of expressions.
         Grammar: (expression (',' expression)* )?
         """
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._write
+        compile_expression = self.compile_expression
+
         # Check if empty
-        if self.tokenizer.current_token == ")":
+        if tokenizer.current_token is _RPAREN:
             return
         
         # Parse first expression
-        self.compile_expression()
+        compile_expression()
         
         # Parse additional expressions
-        while self.tokenizer.current_token == ",":
-            self.output.write(f"<symbol> , </symbol>\n")
-            self.tokenizer.advance()
-            self.compile_expression()
+        while tokenizer.current_token is _COMMA:
+            write("<symbol> , </symbol>\n")
+            advance()
+            compile_expression()
 
     def compile_subroutine_body(self) -> None:
         """Compiles a subroutine body.
         Grammar: '{' varDec* statements '}'
         """
-        if self.tokenizer.current_token != "{":
-            raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-        
-        self.output.write("<subroutineBody>\n")
-        self.output.write(f"<symbol> {{ </symbol>\n")
-        self.tokenizer.advance()
+        self._write("<subroutineBody>\n")
+        self._expect_symbol(_LBRACE)
         
         # Parse varDec* (zero or more)
-        while (self.tokenizer.token_type() == "KEYWORD" and 
-               self.tokenizer.keyword() == "VAR"):
+        while self.tokenizer.current_kw == KW_VAR:
             self.compile_var_dec()
         
         # Parse statements
         self.compile_statements()
         
         # Parse '}'
-        if self.tokenizer.current_token != "}":
-            raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> }} </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_RBRACE)
         
-        self.output.write("</subroutineBody>\n")
+        self._write("</subroutineBody>\n")
 
-    def compile_subroutine_call_direct(self) -> None:
-        """Compiles a subroutine call directly (without expression wrapper).
-        Used by do statements.
+    def compile_subroutine_call(self) -> None:
+        """Compiles a subroutine call.
         Grammar: subroutineName '(' expressionList ')' | 
                  (className | varName) '.' subroutineName '(' expressionList ')'
         """
         # Parse subroutineName or (className|varName)
-        if self.tokenizer.token_type() != "IDENTIFIER":
+        if self.tokenizer.current_type != TT_IDENTIFIER:
             raise ValueError(f"Expected identifier in subroutine call, got {self.tokenizer.current_token}")
         
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-        self.tokenizer.advance()
+        self._emit(_IDENTIFIER_OPEN, self.tokenizer.identifier(), _IDENTIFIER_CLOSE)
         
         # Check for '.' (method call on object/class)
-        if self.tokenizer.current_token == ".":
-            self.output.write(f"<symbol> . </symbol>\n")
+        if self.tokenizer.advance() is _DOT:
+            self._write("<symbol> . </symbol>\n")
             self.tokenizer.advance()
             
             # Parse subroutineName
-            if self.tokenizer.token_type() != "IDENTIFIER":
+            if self.tokenizer.current_type != TT_IDENTIFIER:
                 raise ValueError(f"Expected subroutine name after '.', got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+            self._emit(_IDENTIFIER_OPEN, self.tokenizer.identifier(), _IDENTIFIER_CLOSE)
             self.tokenizer.advance()
         
         # Parse '('
-        if self.tokenizer.current_token != "(":
-            raise ValueError(f"Expected '(' in subroutine call, got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_LPAREN)
         
         # Parse expressionList
-        self.output.write("<expressionList>\n")
+        self._write("<expressionList>\n")
         self.compile_expression_list()
-        self.output.write("</expressionList>\n")
+        self._write("</expressionList>\n")
         
         # Parse ')'
-        if self.tokenizer.current_token != ")":
-            raise ValueError(f"Expected ')' in subroutine call, got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(_RPAREN)
 
-    def compile_subroutine_call(self) -> None:
-        """Compiles a subroutine call.
-        Grammar: subroutineName '(' expressionList ')' | 
-                 (className | varName) '.' subroutineName '(' expressionList ')'
+    def _expect_symbol(self, symbol: str) -> None:
+        """Helper method to check that the current token is the given symbol,
+        write it and advance past it.
+
+        Args:
+            symbol (str): the expected (interned) symbol.
         """
-        # Parse subroutineName or (className|varName)
-        if self.tokenizer.token_type() != "IDENTIFIER":
-            raise ValueError(f"Expected identifier in subroutine call, got {self.tokenizer.current_token}")
-        
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-        self.tokenizer.advance()
-        
-        # Check for '.' (method call on object/class)
-        if self.tokenizer.current_token == ".":
-            self.output.write(f"<symbol> . </symbol>\n")
-            self.tokenizer.advance()
+        tokenizer = self.tokenizer
+        if tokenizer.current_token is not symbol:
+            raise ValueError(f"Expected '{symbol}', got {tokenizer.current_token}")
+        self._write(_SYMBOL_XML[symbol])
+        tokenizer.advance()
+
+    def _emit(self, tag_open: str, text: str, tag_close: str) -> None:
+        """Helper method to buffer an element whose text comes from the input,
+        XML-escaping the text.
+
+        Args:
+            tag_open (str): the opening tag, including the trailing space.
+            text (str): the element's text.
+            tag_close (str): the closing tag, including the newline.
+        """
+        self._buf.extend((tag_open, text.translate(_XML_ESCAPE), tag_close))
+
+    def _parse_name_list(self) -> None:
+        """Helper method to parse varName (',' varName)* ';', shared by class
+        and local variable declarations."""
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._write
+        emit = self._emit
+
+        while True:
+            if tokenizer.current_type != TT_IDENTIFIER:
+                raise ValueError(f"Expected identifier, got {tokenizer.current_token}")
+            emit(_IDENTIFIER_OPEN, tokenizer.identifier(), _IDENTIFIER_CLOSE)
             
-            # Parse subroutineName
-            if self.tokenizer.token_type() != "IDENTIFIER":
-                raise ValueError(f"Expected subroutine name after '.', got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-            self.tokenizer.advance()
-        
-        # Parse '('
-        if self.tokenizer.current_token != "(":
-            raise ValueError(f"Expected '(' in subroutine call, got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
-        self.tokenizer.advance()
-        
-        # Parse expressionList
-        self.output.write("<expressionList>\n")
-        self.compile_expression_list()
-        self.output.write("</expressionList>\n")
+            if advance() is _COMMA:
+                write("<symbol> , </symbol>\n")
+                advance()
+            else:
+                break
         
-        # Parse ')'
-        if self.tokenizer.current_token != ")":
-            raise ValueError(f"Expected ')' in subroutine call, got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
-        self.tokenizer.advance()
+        # Expect ';'
+        self._expect_symbol(_SEMICOLON)
 
     def _parse_type(self) -> None:
         """Helper method to parse a type (int | char | boolean | className)."""
-        if self.tokenizer.token_type() == "KEYWORD" and \
-           self.tokenizer.keyword() in ["INT", "CHAR", "BOOLEAN"]:
-            self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
+        kw = self.tokenizer.current_kw
+        if kw == KW_INT or kw == KW_CHAR or kw == KW_BOOLEAN:
+            self._write(_KEYWORD_XML[kw])
             self.tokenizer.advance()
-        elif self.tokenizer.token_type() == "IDENTIFIER":
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
+        elif self.tokenizer.current_type == TT_IDENTIFIER:
+            self._emit(_IDENTIFIER_OPEN, self.tokenizer.identifier(), _IDENTIFIER_CLOSE)
             self.tokenizer.advance()
         else:
             raise ValueError(f"Expected type, got {self.tokenizer.current_token}")
\ No newline at end of file
@@ -5,22 +5,63 @@ was written by Aviv Yaish. It is an extension to the specifications given
 as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import re
+import sys
 import typing
 
-Keywords = {'class', 'constructor' , 'function' , 'method' , 'field' , 
+Keywords = frozenset({'class', 'constructor' , 'function' , 'method' , 'field' , 
                'static' , 'var' , 'int' , 'char' , 'boolean' , 'void' , 'true' ,
                'false' , 'null' , 'this' , 'let' , 'do' , 'if' , 'else' , 
-               'while' , 'return'}
+               'while' , 'return'})
 
-Symbols = {'{' , '}' , '(' , ')' , '[' , ']' , '.' , ',' , ';' , '+' , 
-              '-' , '*' , '/' , '&' , '|' , '<' , '>' , '=' , '~' , '^' , '#'}
+# Integer ids for the keywords, so that keywords can be told apart with a
+# single integer comparison instead of a string comparison.
+(KW_CLASS, KW_METHOD, KW_FUNCTION, KW_CONSTRUCTOR, KW_INT, KW_BOOLEAN, KW_CHAR,
+ KW_VOID, KW_VAR, KW_STATIC, KW_FIELD, KW_LET, KW_DO, KW_IF, KW_ELSE, KW_WHILE,
+ KW_RETURN, KW_TRUE, KW_FALSE, KW_NULL, KW_THIS) = range(21)
+
+KeywordIds = {'class': KW_CLASS, 'method': KW_METHOD, 'function': KW_FUNCTION,
+              'constructor': KW_CONSTRUCTOR, 'int': KW_INT,
+              'boolean': KW_BOOLEAN, 'char': KW_CHAR, 'void': KW_VOID,
+              'var': KW_VAR, 'static': KW_STATIC, 'field': KW_FIELD,
+              'let': KW_LET, 'do': KW_DO, 'if': KW_IF, 'else': KW_ELSE,
+              'while': KW_WHILE, 'return': KW_RETURN, 'true': KW_TRUE,
+              'false': KW_FALSE, 'null': KW_NULL, 'this': KW_THIS}
+
+# Integer ids for the token types, indexed into TokenTypes. The current
+# token's type is computed once in advance() and kept in current_type.
+(TT_KEYWORD, TT_SYMBOL, TT_IDENTIFIER, TT_INT_CONST, TT_STRING_CONST) = range(5)
+
+TokenTypes = ("KEYWORD", "SYMBOL", "IDENTIFIER", "INT_CONST", "STRING_CONST")
+
+Symbols = frozenset({'{' , '}' , '(' , ')' , '[' , ']' , '.' , ',' , ';' , '+' , 
+              '-' , '*' , '/' , '&' , '|' , '<' , '>' , '=' , '~' , '^' , '#'})
+
+# Token types of the tokens whose type is fixed by the language.
+FixedTokenTypes = dict.fromkeys(Keywords, TT_KEYWORD)
+FixedTokenTypes.update(dict.fromkeys(Symbols, TT_SYMBOL))
 
 IntegerConstantRange = range(0, 32768)
 
-StringConstantDelimiter = {'"', '\n'}
+# Scans the whole input in one pass. Comments are matched by the
+# non-capturing alternatives, so findall() yields an empty string for them;
+# an unterminated block comment runs to the end of the input. Every other
+# alternative captures a single token: a string constant, a run of
+# characters that are neither whitespace nor symbols, a single symbol, or a
+# stray quote. Nothing else is skipped, so invalid input still produces
+# tokens that the classifier and the parser can reject.
+TokenPattern = re.compile(
+    r'//[^\n]*'
+    r'|/\*.*?(?:\*/|\Z)'
+    r'|("[^"\n]*"'
+    r'|[^\s"{}()\[\].,;+\-*/&|<>=~^#]+'
+    r'|[{}()\[\].,;+\-*/&|<>=~^#]'
+    r'|")',
+    re.DOTALL)
 
-IdentifierStartChars = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_")
-IdentifierChars = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_")
+StringConstantPattern = re.compile(r'"[^"\n]*"')
+
+IdentifierPattern = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
 
 class JackTokenizer:
     """Removes all comments from the input stream and breaks it
@@ -106,6 +147,11 @@ class JackTokenizer:
     Note that ^, # correspond to shiftleft and shiftright, respectively.
     """
 
+    # Fixed attribute layout: the current_* attributes are read and written
+    # once per token.
+    __slots__ = ("input", "tokens", "current_index", "current_token",
+                 "current_type", "current_kw", "_token_types")
+
     def __init__(self, input_stream: typing.TextIO) -> None:
         """Opens the input stream and gets ready to tokenize it.
 
@@ -115,82 +161,19 @@ class JackTokenizer:
         # Your code goes here!
         # A good place to start is to read all the lines of the input:
         self.input = input_stream.read()
-        self.tokens = self.input
-        # print("Untouched input:", self.input)
-        self._delete_comments()
-        # print("Input without comments:", self.input)
-        self._isolate_strings()
-        # print("Tokens after isolating strings:", self.tokens)
-        self._split_non_string_tokens()
-        # print("Final tokens:", self.tokens)
+        # Interned tokens can be compared by identity against interned
+        # constants, and repeated names share a single string object.
+        self.tokens = [sys.intern(token)
+                       for token in TokenPattern.findall(self.input)
+                       if token]
         self.current_index = 0
         self.current_token = None
-
-    def _split_non_string_tokens(self) -> None:
-        new_tokens = []
-        for token in self.tokens:
-            if token.startswith('"') and token.endswith('"'):
-                new_tokens.append(token)
-            else:
-                current_token = ""
-                for char in token:
-                    if char in Symbols:
-                        if current_token:
-                            new_tokens.append(current_token)
-                            current_token = ""
-                        new_tokens.append(char)
-                    elif char.isspace():
-                        if current_token:
-                            new_tokens.append(current_token)
-                            current_token = ""
-                    else:
-                        current_token += char
-                if current_token:
-                    new_tokens.append(current_token)
-        self.tokens = new_tokens
-
-    def _isolate_strings(self) -> None:
-        self.tokens = self.input.split('"')
-        for i in range(1, len(self.tokens), 2):
-            self.tokens[i] = '"' + self.tokens[i] + '"'
-
-    def _delete_comments(self) -> str:
-        """Deletes all comments from the input string.
-
-        Args:
-            input_str (str): input string.
-        Returns:
-            str: input string without comments.
-        """
-        in_block_comment = False
-        in_line_comment = False
-        i = 0
-        result = ""
-        while i < len(self.input):
-            if in_block_comment:
-                if self.input[i:i+2] == '*/':
-                    in_block_comment = False
-                    i += 2
-                else:
-                    i += 1
-            elif in_line_comment:
-                if self.input[i] == '\n':
-                    in_line_comment = False
-                    result += self.input[i]
-                    i += 1
-                else:
-                    i += 1
-            else:
-                if self.input[i:i+2] == '/*':
-                    in_block_comment = True
-                    i += 2
-                elif self.input[i:i+2] == '//':
-                    in_line_comment = True
-                    i += 2
-                else:
-                    result += self.input[i]
-                    i += 1
-        self.input = result
+        # TT_* id of the current token, and its KW_* id (-1 if not a keyword).
+        self.current_type = -1
+        self.current_kw = -1
+        # TT_* ids of the tokens seen so far, so that each distinct token is
+        # classified only once.
+        self._token_types = dict(FixedTokenTypes)
 
     def has_more_tokens(self) -> bool:
         """Do we have more tokens in the input?
@@ -201,44 +184,58 @@ class JackTokenizer:
         # Your code goes here!
         return self.current_index < len(self.tokens)
 
-    def advance(self) -> None:
+    def advance(self) -> str:
         """Gets the next token from the input and makes it the current token. 
         This method should be called if has_more_tokens() is true. 
         Initially there is no current token.
+
+        Returns:
+            str: the current token after advancing, so that callers can keep
+            it in a local instead of re-reading current_token.
         """
         # Your code goes here!
         if self.has_more_tokens():
-            self.current_token = self.tokens[self.current_index]
+            token = self.tokens[self.current_index]
+            self.current_token = token
             self.current_index += 1
-             
-    def token_type(self) -> str:
+            self.current_kw = KeywordIds.get(token, -1)
+            token_type = self._token_types.get(token)
+            if token_type is None:
+                token_type = self._token_types[token] = self._classify(token)
+            self.current_type = token_type
+        return self.current_token
+
+    def _classify(self, token: str) -> int:
         """
+        Args:
+            token (str): a token produced by the tokenizer.
+
         Returns:
-            str: the type of the current token, can be
-            "KEYWORD", "SYMBOL", "IDENTIFIER", "INT_CONST", "STRING_CONST"
+            int: the TT_* id of the token's type.
         """
-        # Check for keyword
-        if self.current_token in Keywords:
-            return "KEYWORD"
-        # Check for symbol
-        elif self.current_token in Symbols:
-            return "SYMBOL"
+        # Keywords and symbols are looked up in FixedTokenTypes by advance().
         # Check for integer constant (only digits, within range 0-32767)
-        elif self.current_token.isdigit() and int(self.current_token) in IntegerConstantRange:
-            return "INT_CONST"
+        if token.isdigit() and int(token) in IntegerConstantRange:
+            return TT_INT_CONST
         # Check for string constant (enclosed in quotes, no internal quotes or newlines)
-        elif (self.current_token.startswith('"') and 
-              self.current_token.endswith('"') and 
-              '\n' not in self.current_token and '"' not in self.current_token[1:-1]):
-            return "STRING_CONST"
+        elif StringConstantPattern.fullmatch(token):
+            return TT_STRING_CONST
         # Check for valid identifier (starts with letter or underscore, contains only valid chars)
-        elif (len(self.current_token) > 0 and 
-              self.current_token[0] in IdentifierStartChars and 
-              all(c in IdentifierChars for c in self.current_token)):
-            return "IDENTIFIER"
+        elif IdentifierPattern.fullmatch(token):
+            return TT_IDENTIFIER
         else:
             # Invalid token - shouldn't happen with valid Jack code
-            return "IDENTIFIER"
+            return TT_IDENTIFIER
+             
+    def token_type(self) -> str:
+        """
+        Returns:
+            str: the type of the current token, can be
+            "KEYWORD", "SYMBOL", "IDENTIFIER", "INT_CONST", "STRING_CONST"
+        """
+        if self.current_type < 0:
+            return None
+        return TokenTypes[self.current_type]
 
     def keyword(self) -> str:
         """
@@ -250,11 +247,20 @@ class JackTokenizer:
             "IF", "ELSE", "WHILE", "RETURN", "TRUE", "FALSE", "NULL", "THIS"
         """
         # Your code goes here!
-        if self.token_type() == "KEYWORD":
+        if self.current_type == TT_KEYWORD:
             return self.current_token.upper()
         else:
             raise ValueError("Current token is not a keyword")
 
+    def keyword_id(self) -> int:
+        """
+        Returns:
+            int: the KW_* id of the keyword which is the current token, or -1
+            if the current token is not a keyword. Unlike keyword(), this can
+            be called on any token, so callers need not check token_type().
+        """
+        return self.current_kw
+
     def symbol(self) -> str:
         """
         Returns:
@@ -265,7 +271,7 @@ class JackTokenizer:
               '-' | '*' | '/' | '&' | '|' | '<' | '>' | '=' | '~' | '^' | '#'
         """
         # Your code goes here!
-        if self.token_type() == "SYMBOL":
+        if self.current_type == TT_SYMBOL:
             return self.current_token
         else:
             raise ValueError("Current token is not a symbol")
@@ -280,7 +286,7 @@ class JackTokenizer:
                   starting with a digit. You can assume keywords cannot be
                   identifiers, so 'self' cannot be an identifier, etc'.
         """
-        if self.token_type() != "IDENTIFIER":
+        if self.current_type != TT_IDENTIFIER:
             raise ValueError(f"Current token '{self.current_token}' is not a valid identifier")
         return self.current_token
 
@@ -293,7 +299,7 @@ class JackTokenizer:
             integerConstant: A decimal number in the range 0-32767.
         """
         # Your code goes here!
-        if self.token_type() == "INT_CONST":
+        if self.current_type == TT_INT_CONST:
             return int(self.current_token)
         else:
             raise ValueError("Current token is not an integer constant")
@@ -308,7 +314,7 @@ class JackTokenizer:
                       double quote or newline '"'
         """
         # Your code goes here!
-        if self.token_type() == "STRING_CONST":
+        if self.current_type == TT_STRING_CONST:
             return self.current_token[1:-1]
         else:
             raise ValueError("Current token is not a string constant")
\ No newline at end of file
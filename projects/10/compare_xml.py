@@ -3,12 +3,19 @@ XML Comparison Tool - Compares *Cmp.xml files with *.xml files
 Ignores whitespace and indentation differences
 """
 
+import io
 import os
 import re
 from pathlib import Path
 from typing import Tuple, List
 
 
+# Matches, in one pass, whitespace between two tags, an opening tag
+# (group 1) followed by whitespace, or whitespace before a closing tag.
+# Substituting r'\1' drops the whitespace and keeps the tag.
+_WHITESPACE = re.compile(r'(?<=>)\s+(?=<)|(<\w+>)\s+|\s+(?=</\w+>)')
+
+
 def normalize_xml(xml_content: str) -> str:
     """
     Normalize XML by removing excess whitespace and indentation.
@@ -17,14 +24,9 @@ def normalize_xml(xml_content: str) -> str:
     # Remove leading/trailing whitespace
     xml_content = xml_content.strip()
     
-    # Remove newlines and extra spaces between tags
-    # This regex removes all whitespace between > and <
-    xml_content = re.sub(r'>\s+<', '><', xml_content)
-    
-    # Remove leading/trailing whitespace inside tags (but not in text content)
-    # Match tags and remove spaces around content
-    xml_content = re.sub(r'<(\w+)>\s+', r'<\1>', xml_content)
-    xml_content = re.sub(r'\s+</(\w+)>', r'</\1>', xml_content)
+    # Remove newlines and extra spaces between tags, and leading/trailing
+    # whitespace inside tags (but not in text content)
+    xml_content = _WHITESPACE.sub(r'\1', xml_content)
     
     return xml_content
 
@@ -38,6 +40,26 @@ def read_xml_file(filepath: str) -> str:
         return f"ERROR: {e}"
 
 
+def _stream_equal(path1: str, path2: str, chunk_size: int = 65536) -> bool:
+    """
+    Check whether two files are byte-for-byte identical, comparing sizes
+    first and then reading both in chunks, stopping at the first difference.
+    Returns False if either file cannot be read.
+    """
+    try:
+        if os.path.getsize(path1) != os.path.getsize(path2):
+            return False
+        with open(path1, 'rb') as f1, open(path2, 'rb') as f2:
+            while True:
+                chunk1 = f1.read(chunk_size)
+                if chunk1 != f2.read(chunk_size):
+                    return False
+                if not chunk1:
+                    return True
+    except OSError:
+        return False
+
+
 def compare_xml_files(cmp_file: str, xml_file: str) -> Tuple[bool, str]:
     """
     Compare two XML files ignoring whitespace.
@@ -46,6 +68,10 @@ def compare_xml_files(cmp_file: str, xml_file: str) -> Tuple[bool, str]:
     if not os.path.exists(xml_file):
         return False, f"Missing: {xml_file}"
     
+    # Identical files match without being normalized
+    if _stream_equal(cmp_file, xml_file):
+        return True, "✓ Match"
+    
     cmp_content = read_xml_file(cmp_file)
     xml_content = read_xml_file(xml_file)
     
@@ -60,24 +86,67 @@ def compare_xml_files(cmp_file: str, xml_file: str) -> Tuple[bool, str]:
         return False, "✗ Content differs"
 
 
-def find_and_compare_xml_files(root_dir: str) -> List[Tuple[str, bool, str]]:
+def _compare_pair(cmp_file: str) -> Tuple[str, bool, str]:
+    """
+    Compare a *Cmp.xml file with its corresponding *.xml file.
+    Returns (filepath, match_status, message)
+    """
+    # Get the corresponding *.xml file
+    base_path = cmp_file.replace('Cmp.xml', '.xml')
+    
+    match, message = compare_xml_files(cmp_file, base_path)
+    return cmp_file, match, message
+
+
+def _check_jack_file(cmp_file: str) -> Tuple[str, bool, str]:
+    """
+    Compile the *.jack file corresponding to a *Cmp.xml file into memory,
+    without writing its XML to disk, and compare the normalized output with
+    the normalized *Cmp.xml file.
+    Returns (filepath, match_status, message)
+    """
+    # Imported here so that the plain comparison does not need the analyzer
+    from CompilationEngine import CompilationEngine
+    from JackTokenizer import JackTokenizer
+    
+    jack_file = cmp_file.replace('Cmp.xml', '.jack')
+    if not os.path.exists(jack_file):
+        return cmp_file, False, f"Missing: {jack_file}"
+    
+    try:
+        with open(cmp_file, 'r', encoding='utf-8') as f:
+            cmp_content = normalize_xml(f.read())
+        with open(jack_file, 'r') as f:
+            tokenizer = JackTokenizer(f)
+        output = io.StringIO()
+        engine = CompilationEngine(tokenizer, output)
+        if tokenizer.has_more_tokens():
+            tokenizer.advance()
+            engine.compile_class()
+    except Exception as e:
+        return cmp_file, False, f"ERROR: {e}"
+    
+    if normalize_xml(output.getvalue()) == cmp_content:
+        return cmp_file, True, "✓ Match"
+    else:
+        return cmp_file, False, "✗ Content differs"
+
+
+def find_and_compare_xml_files(
+        root_dir: str, from_jack: bool = False) -> List[Tuple[str, bool, str]]:
     """
     Find all *Cmp.xml files and compare them with *.xml files.
+    If from_jack is True, the *.jack files are compiled and checked against
+    the *Cmp.xml files directly, without reading or writing any *.xml file.
     Returns list of (filepath, match_status, message)
     """
-    results = []
-    
     root_path = Path(root_dir)
     
     # Find all *Cmp.xml files
-    for cmp_file in sorted(root_path.rglob('*Cmp.xml')):
-        # Get the corresponding *.xml file
-        base_path = str(cmp_file).replace('Cmp.xml', '.xml')
-        
-        match, message = compare_xml_files(str(cmp_file), base_path)
-        results.append((str(cmp_file), match, message))
+    cmp_files = [str(cmp_file) for cmp_file in sorted(root_path.rglob('*Cmp.xml'))]
     
-    return results
+    compare = _check_jack_file if from_jack else _compare_pair
+    return [compare(cmp_file) for cmp_file in cmp_files]
 
 
 def print_report(results: List[Tuple[str, bool, str]]) -> None:
@@ -116,9 +185,14 @@ def print_report(results: List[Tuple[str, bool, str]]) -> None:
 if __name__ == "__main__":
     import sys
     
-    # Use current directory or argument
-    root_directory = sys.argv[1] if len(sys.argv) > 1 else "."
+    # Use current directory or argument; --from-jack checks the *.jack files
+    # against the *Cmp.xml files without going through *.xml files
+    args = sys.argv[1:]
+    from_jack = "--from-jack" in args
+    if from_jack:
+        args.remove("--from-jack")
+    root_directory = args[0] if args else "."
     
     print(f"Scanning directory: {root_directory}")
-    results = find_and_compare_xml_files(root_directory)
+    results = find_and_compare_xml_files(root_directory, from_jack)
     print_report(results)
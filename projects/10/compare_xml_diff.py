@@ -5,39 +5,11 @@ Shows detailed diffs for mismatches
 """
 
 import os
-import re
 from pathlib import Path
 from typing import Tuple, List
 from difflib import unified_diff
 
-
-def normalize_xml(xml_content: str) -> str:
-    """
-    Normalize XML by removing excess whitespace and indentation.
-    Preserves only meaningful content.
-    """
-    # Remove leading/trailing whitespace
-    xml_content = xml_content.strip()
-    
-    # Remove newlines and extra spaces between tags
-    # This regex removes all whitespace between > and <
-    xml_content = re.sub(r'>\s+<', '><', xml_content)
-    
-    # Remove leading/trailing whitespace inside tags (but not in text content)
-    # Match tags and remove spaces around content
-    xml_content = re.sub(r'<(\w+)>\s+', r'<\1>', xml_content)
-    xml_content = re.sub(r'\s+</(\w+)>', r'</\1>', xml_content)
-    
-    return xml_content
-
-
-def read_xml_file(filepath: str) -> str:
-    """Read and normalize XML file content."""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return normalize_xml(f.read())
-    except Exception as e:
-        return f"ERROR: {e}"
+from compare_xml import read_xml_file
 
 
 def read_xml_file_pretty(filepath: str) -> List[str]:
@@ -71,36 +43,40 @@ def compare_xml_files(cmp_file: str, xml_file: str) -> Tuple[bool, str, str, str
         return False, "✗ Content differs", cmp_content, xml_content
 
 
+def _compare_pair(cmp_file: str) -> Tuple[str, bool, str, str, str]:
+    """
+    Compare a *Cmp.xml file with its corresponding *.xml file.
+    Returns (filepath, match_status, message, cmp_content, xml_content)
+    """
+    # Get the corresponding *.xml file
+    base_path = cmp_file.replace('Cmp.xml', '.xml')
+    
+    match, message, cmp_content, xml_content = compare_xml_files(cmp_file, base_path)
+    return cmp_file, match, message, cmp_content, xml_content
+
+
 def find_and_compare_xml_files(root_dir: str) -> List[Tuple[str, bool, str, str, str]]:
     """
     Find all *Cmp.xml files and compare them with *.xml files.
     Returns list of (filepath, match_status, message, cmp_content, xml_content)
     """
-    results = []
-    
     root_path = Path(root_dir)
     
     # Find all *Cmp.xml files
-    for cmp_file in sorted(root_path.rglob('*Cmp.xml')):
-        # Get the corresponding *.xml file
-        base_path = str(cmp_file).replace('Cmp.xml', '.xml')
-        
-        match, message, cmp_content, xml_content = compare_xml_files(str(cmp_file), base_path)
-        results.append((str(cmp_file), match, message, cmp_content, xml_content))
+    cmp_files = [str(cmp_file) for cmp_file in sorted(root_path.rglob('*Cmp.xml'))]
     
-    return results
+    return [_compare_pair(cmp_file) for cmp_file in cmp_files]
 
 
-def show_diff(cmp_file: str, xml_file: str) -> None:
-    """Show side-by-side diff of mismatched files."""
+def show_diff(cmp_content: str, xml_content: str,
+              cmp_file: str, xml_file: str) -> None:
+    """Show side-by-side diff of mismatched files, given their already
+    normalized contents."""
     print(f"\nDetailed comparison:")
     print(f"  Expected (Cmp): {cmp_file}")
     print(f"  Generated:      {xml_file}")
     print("\nShowing first difference (normalized XML):\n")
     
-    cmp_content = read_xml_file(cmp_file)
-    xml_content = read_xml_file(xml_file)
-    
     # Find first difference position
     for i, (c1, c2) in enumerate(zip(cmp_content, xml_content)):
         if c1 != c2:
@@ -140,9 +116,11 @@ def print_report(results: List[Tuple[str, bool, str, str, str]], show_diffs: boo
             matches += 1
         else:
             mismatches += 1
-            if show_diffs:
+            # Missing or unreadable files have no contents to diff; the
+            # message above already says why.
+            if show_diffs and (cmp_content or xml_content):
                 base_path = filepath.replace('Cmp.xml', '.xml')
-                show_diff(filepath, base_path)
+                show_diff(cmp_content, xml_content, filepath, base_path)
     
     print("\n" + "=" * 80)
     print(f"Summary: {matches} passed, {mismatches} failed (Total: {len(results)})")
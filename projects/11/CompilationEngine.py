@@ -6,6 +6,45 @@ as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
 import typing
+from JackTokenizer import (
+    JackTokenizer, Keywords, Symbols, KW_CLASS, KW_CONSTRUCTOR, KW_FUNCTION,
+    KW_METHOD, KW_INT, KW_CHAR, KW_BOOLEAN, KW_VOID, KW_VAR, KW_STATIC,
+    KW_FIELD, KW_LET, KW_DO, KW_IF, KW_ELSE, KW_WHILE, KW_RETURN, KW_TRUE,
+    KW_FALSE, KW_NULL, KW_THIS, TT_KEYWORD, TT_IDENTIFIER, TT_INT_CONST,
+    TT_STRING_CONST)
+
+
+# Complete XML element for every keyword, looked up by the token itself so
+# that keyword() and lower() are not called per emitted keyword.
+_KEYWORD_XML = {keyword: "<keyword> %s </keyword>\n" % keyword
+                for keyword in Keywords}
+
+# Complete XML element for every symbol, already escaped, so that operators
+# are emitted without formatting or escaping them per occurrence.
+_SYMBOL_ESCAPES = {"<": "&lt;", ">": "&gt;", "&": "&amp;"}
+_SYMBOL_XML = {symbol: "<symbol> %s </symbol>\n"
+                       % _SYMBOL_ESCAPES.get(symbol, symbol)
+               for symbol in Symbols}
+
+# XML element for each primitive type keyword by keyword id, so that a type
+# is resolved with one lookup instead of a keyword test and a second lookup.
+_TYPE_KEYWORD_XML = {KW_INT: _KEYWORD_XML["int"],
+                     KW_CHAR: _KEYWORD_XML["char"],
+                     KW_BOOLEAN: _KEYWORD_XML["boolean"]}
+
+# Token groups tested on every parse step, as frozensets so that membership
+# is a single hash lookup instead of a scan over a new list.
+_CLASS_VAR_KEYWORDS = frozenset((KW_STATIC, KW_FIELD))
+_SUBROUTINE_KEYWORDS = frozenset((KW_CONSTRUCTOR, KW_FUNCTION, KW_METHOD))
+_KEYWORD_CONSTANTS = frozenset((KW_TRUE, KW_FALSE, KW_NULL, KW_THIS))
+_OPS = frozenset(("+", "-", "*", "/", "&", "|", "<", ">", "="))
+_UNARY_OPS = frozenset(("-", "~", "^", "#"))
+_EXPRESSION_END = frozenset((";", "]", ")", ","))
+
+# Escapes for the XML special characters, applied in one str.translate pass.
+_XML_ESCAPES = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+_XML_SPECIAL_CHARS = frozenset('&<>"')
 
 
 class CompilationEngine:
@@ -13,7 +52,13 @@ class CompilationEngine:
     output stream.
     """
 
-    def __init__(self, input_stream: "JackTokenizer", output_stream) -> None:
+    # Fixed attribute layout: the engine is instantiated once per file and
+    # its attributes are read on every token.
+    __slots__ = ("tokenizer", "output", "_out", "_out_append",
+                 "_stmt_dispatch", "_term_dispatch")
+
+    def __init__(self, input_stream: JackTokenizer,
+                 output_stream: typing.TextIO) -> None:
         """
         Creates a new compilation engine with the given input and output. The
         next routine called must be compileClass()
@@ -22,496 +67,480 @@ class CompilationEngine:
         """
         self.tokenizer = input_stream
         self.output = output_stream
+        # XML fragments are collected here and written out in one call at
+        # the end of compile_class.
+        self._out = []
+        self._out_append = self._out.append
+        # Statement compilers by keyword, so compile_statements dispatches
+        # with one lookup instead of a chain of keyword comparisons.
+        self._stmt_dispatch = {
+            KW_LET: self.compile_let,
+            KW_IF: self.compile_if,
+            KW_WHILE: self.compile_while,
+            KW_DO: self.compile_do,
+            KW_RETURN: self.compile_return,
+        }
+        # Term compilers by token type, for the terms that do not start with
+        # a symbol.
+        self._term_dispatch = {
+            TT_INT_CONST: self._compile_int_term,
+            TT_STRING_CONST: self._compile_string_term,
+            TT_KEYWORD: self._compile_keyword_term,
+            TT_IDENTIFIER: self._compile_identifier_term,
+        }
 
     def _escape_xml(self, token: str) -> str:
         """Escapes XML special characters (<, >, &, \")."""
-        return token.replace("&", "&amp;") \
-                    .replace("<", "&lt;") \
-                    .replace(">", "&gt;") \
-                    .replace('"', "&quot;")
+        # Most tokens contain none of them and are returned as they are.
+        if _XML_SPECIAL_CHARS.isdisjoint(token):
+            return token
+        return token.translate(_XML_ESCAPES)
+
+    def _check_symbol(self, symbol: str) -> None:
+        """Checks that the current token is the given symbol, for callers
+        that write it as part of a larger fragment.
+
+        Args:
+            symbol (str): the symbol the grammar requires here.
+        """
+        token = self.tokenizer.current_token
+        if token != symbol:
+            raise ValueError(f"Expected '{symbol}', got {token}")
+
+    def _expect_symbol(self, symbol: str) -> None:
+        """Checks that the current token is the given symbol, writes it and
+        advances past it.
+
+        Args:
+            symbol (str): the symbol the grammar requires here.
+        """
+        self._check_symbol(symbol)
+        self._out_append(_SYMBOL_XML[symbol])
+        self.tokenizer.advance()
 
     def compile_class(self) -> None:
         """Compiles a complete class.
         Grammar: 'class' className '{' classVarDec* subroutineDec* '}'
         """
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
         # Expect 'class' keyword
-        if self.tokenizer.token_type() != "KEYWORD" or self.tokenizer.keyword() != "CLASS":
-            raise ValueError(f"Expected 'class', got {self.tokenizer.current_token}")
+        if tokenizer.current_kw != KW_CLASS:
+            raise ValueError(f"Expected 'class', got {tokenizer.current_token}")
         
-        self.output.write("<class>\n")
-        self.output.write(f"<keyword> class </keyword>\n")
-        self.tokenizer.advance()
+        write("<class>\n")
+        write(_KEYWORD_XML["class"])
+        advance()
         
         # Expect className (identifier)
-        if self.tokenizer.token_type() != "IDENTIFIER":
-            raise ValueError(f"Expected className, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-        self.tokenizer.advance()
+        if tokenizer.current_type != TT_IDENTIFIER:
+            raise ValueError(f"Expected className, got {tokenizer.current_token}")
+        write(f"<identifier> {tokenizer.identifier()} </identifier>\n")
+        advance()
         
         # Expect '{'
-        if self.tokenizer.current_token != "{":
-            raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> {{ </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol("{")
         
         # Parse classVarDec* (zero or more)
-        while (self.tokenizer.token_type() == "KEYWORD" and 
-               self.tokenizer.keyword() in ["STATIC", "FIELD"]):
+        while tokenizer.current_kw in _CLASS_VAR_KEYWORDS:
             self.compile_class_var_dec()
         
         # Parse subroutineDec* (zero or more)
-        while (self.tokenizer.token_type() == "KEYWORD" and 
-               self.tokenizer.keyword() in ["CONSTRUCTOR", "FUNCTION", "METHOD"]):
+        while tokenizer.current_kw in _SUBROUTINE_KEYWORDS:
             self.compile_subroutine()
         
         # Expect '}'
-        if self.tokenizer.current_token != "}":
-            raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> }} </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol("}")
         
-        self.output.write("</class>\n")
+        write("</class>\n")
+        self.output.write("".join(self._out))
+        self._out.clear()
         
 
     def compile_class_var_dec(self) -> None:
         """Compiles a static declaration or a field declaration.
         Grammar: ('static' | 'field') type varName (',' varName)* ';'
+        Should be called only when the current token is 'static' or 'field'.
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() in ["STATIC", "FIELD"]):
-            return
-        
-        self.output.write("<classVarDec>\n")
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
+        write("<classVarDec>\n")
         
         # Parse 'static' or 'field'
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
-        self.tokenizer.advance()
+        write(_KEYWORD_XML[tokenizer.current_token])
+        advance()
         
-        # Parse type
+        # Parse type: int | char | boolean | className
         self._parse_type()
         
         # Parse varName (',' varName)*
         while True:
-            if self.tokenizer.token_type() != "IDENTIFIER":
-                raise ValueError(f"Expected identifier, got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-            self.tokenizer.advance()
+            if tokenizer.current_type != TT_IDENTIFIER:
+                raise ValueError(f"Expected identifier, got {tokenizer.current_token}")
+            write(f"<identifier> {tokenizer.identifier()} </identifier>\n")
+            advance()
             
-            if self.tokenizer.current_token == ",":
-                self.output.write(f"<symbol> , </symbol>\n")
-                self.tokenizer.advance()
+            if tokenizer.current_token == ",":
+                write(_SYMBOL_XML[","])
+                advance()
             else:
                 break
         
         # Expect ';'
-        if self.tokenizer.current_token != ";":
-            raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(";")
         
-        self.output.write("</classVarDec>\n")
+        write("</classVarDec>\n")
 
     def compile_subroutine(self) -> None:
         """
         Compiles a complete method, function, or constructor.
         Grammar: ('constructor' | 'function' | 'method') ('void' | type) 
                  subroutineName '(' parameterList ')' subroutineBody
+        Should be called only when the current token is 'constructor',
+        'function' or 'method'.
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() in ["CONSTRUCTOR", "FUNCTION", "METHOD"]):
-            return
-        
-        self.output.write("<subroutineDec>\n")
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
+        write("<subroutineDec>\n")
         
         # Parse 'constructor', 'function', or 'method'
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
-        self.tokenizer.advance()
+        write(_KEYWORD_XML[tokenizer.current_token])
+        advance()
         
         # Parse return type ('void' or type)
-        if self.tokenizer.token_type() == "KEYWORD" and self.tokenizer.keyword() == "VOID":
-            self.output.write(f"<keyword> void </keyword>\n")
-            self.tokenizer.advance()
+        if tokenizer.current_kw == KW_VOID:
+            write(_KEYWORD_XML["void"])
+            advance()
         else:
+            # Parse type: int | char | boolean | className
             self._parse_type()
         
         # Parse subroutineName (identifier)
-        if self.tokenizer.token_type() != "IDENTIFIER":
-            raise ValueError(f"Expected subroutine name, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-        self.tokenizer.advance()
+        if tokenizer.current_type != TT_IDENTIFIER:
+            raise ValueError(f"Expected subroutine name, got {tokenizer.current_token}")
+        write(f"<identifier> {tokenizer.identifier()} </identifier>\n")
+        advance()
         
         # Parse '('
-        if self.tokenizer.current_token != "(":
-            raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol("(")
         
         # Parse parameterList
         self.compile_parameter_list()
         
         # Parse ')'
-        if self.tokenizer.current_token != ")":
-            raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(")")
         
         # Parse subroutineBody
         self.compile_subroutine_body()
         
-        self.output.write("</subroutineDec>\n")
+        write("</subroutineDec>\n")
 
     def compile_parameter_list(self) -> None:
         """Compiles a (possibly empty) parameter list, not including the 
         enclosing "()".
         Grammar: ((type varName) (',' type varName)*)?
         """
-        self.output.write("<parameterList>\n")
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
+        write("<parameterList>\n")
         
         # Check if parameter list is empty
-        if self.tokenizer.current_token == ")":
-            self.output.write("</parameterList>\n")
+        if tokenizer.current_token == ")":
+            write("</parameterList>\n")
             return
         
         # Parse first parameter
+        # Parse type: int | char | boolean | className
         self._parse_type()
         
-        if self.tokenizer.token_type() != "IDENTIFIER":
-            raise ValueError(f"Expected parameter name, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-        self.tokenizer.advance()
+        if tokenizer.current_type != TT_IDENTIFIER:
+            raise ValueError(f"Expected parameter name, got {tokenizer.current_token}")
+        write(f"<identifier> {tokenizer.identifier()} </identifier>\n")
+        advance()
         
         # Parse additional parameters
-        while self.tokenizer.current_token == ",":
-            self.output.write(f"<symbol> , </symbol>\n")
-            self.tokenizer.advance()
+        while tokenizer.current_token == ",":
+            write(_SYMBOL_XML[","])
+            advance()
             
+            # Parse type: int | char | boolean | className
             self._parse_type()
             
-            if self.tokenizer.token_type() != "IDENTIFIER":
-                raise ValueError(f"Expected parameter name, got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-            self.tokenizer.advance()
+            if tokenizer.current_type != TT_IDENTIFIER:
+                raise ValueError(f"Expected parameter name, got {tokenizer.current_token}")
+            write(f"<identifier> {tokenizer.identifier()} </identifier>\n")
+            advance()
         
-        self.output.write("</parameterList>\n")
+        write("</parameterList>\n")
 
     def compile_var_dec(self) -> None:
         """Compiles a var declaration.
         Grammar: 'var' type varName (',' varName)* ';'
+        Should be called only when the current token is 'var'.
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() == "VAR"):
-            return
-        
-        self.output.write("<varDec>\n")
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
+        write("<varDec>\n")
         
         # Parse 'var' keyword
-        self.output.write(f"<keyword> var </keyword>\n")
-        self.tokenizer.advance()
+        write(_KEYWORD_XML["var"])
+        advance()
         
-        # Parse type
+        # Parse type: int | char | boolean | className
         self._parse_type()
         
         # Parse varName (',' varName)*
         while True:
-            if self.tokenizer.token_type() != "IDENTIFIER":
-                raise ValueError(f"Expected identifier, got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-            self.tokenizer.advance()
+            if tokenizer.current_type != TT_IDENTIFIER:
+                raise ValueError(f"Expected identifier, got {tokenizer.current_token}")
+            write(f"<identifier> {tokenizer.identifier()} </identifier>\n")
+            advance()
             
-            if self.tokenizer.current_token == ",":
-                self.output.write(f"<symbol> , </symbol>\n")
-                self.tokenizer.advance()
+            if tokenizer.current_token == ",":
+                write(_SYMBOL_XML[","])
+                advance()
             else:
                 break
         
         # Expect ';'
-        if self.tokenizer.current_token != ";":
-            raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(";")
         
-        self.output.write("</varDec>\n")
+        write("</varDec>\n")
 
     def compile_statements(self) -> None:
         """Compiles a sequence of statements, not including the enclosing 
         "{}".
         Grammar: statement*
         """
-        self.output.write("<statements>\n")
-        
-        while (self.tokenizer.token_type() == "KEYWORD" and 
-               self.tokenizer.keyword() in ["LET", "IF", "WHILE", "DO", "RETURN"]):
-            if self.tokenizer.keyword() == "LET":
-                self.compile_let()
-            elif self.tokenizer.keyword() == "IF":
-                self.compile_if()
-            elif self.tokenizer.keyword() == "WHILE":
-                self.compile_while()
-            elif self.tokenizer.keyword() == "DO":
-                self.compile_do()
-            elif self.tokenizer.keyword() == "RETURN":
-                self.compile_return()
-        
-        self.output.write("</statements>\n")
+        tokenizer = self.tokenizer
+        write = self._out_append
+        write("<statements>\n")
+        
+        stmt_dispatch = self._stmt_dispatch
+        while True:
+            compile_statement = stmt_dispatch.get(tokenizer.current_kw)
+            if compile_statement is None:
+                break
+            compile_statement()
+        
+        write("</statements>\n")
 
     def compile_do(self) -> None:
         """Compiles a do statement.
         Grammar: 'do' subroutineCall ';'
+        Should be called only when the current token is 'do'.
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() == "DO"):
-            return
-        
-        self.output.write("<doStatement>\n")
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
+        write("<doStatement>\n")
         
         # 1. 'do' keyword
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
-        self.tokenizer.advance()
+        write(_KEYWORD_XML[tokenizer.current_token])
+        advance()
         
         # 2. subroutineCall logic
         # Expect Identifier (className | varName | subroutineName)
-        if self.tokenizer.token_type() != "IDENTIFIER":
-            raise ValueError(f"Expected identifier in do statement, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-        self.tokenizer.advance()
+        if tokenizer.current_type != TT_IDENTIFIER:
+            raise ValueError(f"Expected identifier in do statement, got {tokenizer.current_token}")
+        write(f"<identifier> {tokenizer.identifier()} </identifier>\n")
+        advance()
         
         # Check for '.' (method call like Game.run)
-        if self.tokenizer.current_token == ".":
-            self.output.write(f"<symbol> . </symbol>\n")
-            self.tokenizer.advance()
+        if tokenizer.current_token == ".":
+            write(_SYMBOL_XML["."])
+            advance()
             
             # Expect subroutineName
-            if self.tokenizer.token_type() != "IDENTIFIER":
-                raise ValueError(f"Expected subroutine name after '.', got {self.tokenizer.current_token}")
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-            self.tokenizer.advance()
-        
-        # Expect '('
-        if self.tokenizer.current_token != "(":
-            raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
-        self.tokenizer.advance()
+            if tokenizer.current_type != TT_IDENTIFIER:
+                raise ValueError(f"Expected subroutine name after '.', got {tokenizer.current_token}")
+            write(f"<identifier> {tokenizer.identifier()} </identifier>\n")
+            advance()
         
-        # 3. Compile expression list
-        self.output.write("<expressionList>\n")
-        self.compile_expression_list()
-        self.output.write("</expressionList>\n")
-        
-        # Expect ')'
-        if self.tokenizer.current_token != ")":
-            raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
-        self.tokenizer.advance()
+        # 3. '(' expressionList ')'
+        self._compile_call_arguments()
         
         # 4. Expect ';'
-        if self.tokenizer.current_token != ";":
-            raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(";")
         
-        self.output.write("</doStatement>\n")
+        write("</doStatement>\n")
     
     def compile_let(self) -> None:
         """Compiles a let statement.
         Grammar: 'let' varName ('[' expression ']')? '=' expression ';'
+        Should be called only when the current token is 'let'.
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() == "LET"):
-            return
-        
-        self.output.write("<letStatement>\n")
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
-        self.tokenizer.advance()
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
+        write("<letStatement>\n")
+        write(_KEYWORD_XML[tokenizer.current_token])
+        advance()
         
         # Expect varName
-        if self.tokenizer.token_type() != "IDENTIFIER":
-            raise ValueError(f"Expected variable name, got {self.tokenizer.current_token}")
-        self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-        self.tokenizer.advance()
+        if tokenizer.current_type != TT_IDENTIFIER:
+            raise ValueError(f"Expected variable name, got {tokenizer.current_token}")
+        write(f"<identifier> {tokenizer.identifier()} </identifier>\n")
+        advance()
         
         # Handle optional array subscript: '[' expression ']'
-        if self.tokenizer.current_token == "[":
-            self.output.write(f"<symbol> [ </symbol>\n")
-            self.tokenizer.advance()
+        if tokenizer.current_token == "[":
+            write(_SYMBOL_XML["["])
+            advance()
             self.compile_expression()
-            if self.tokenizer.current_token != "]":
-                raise ValueError(f"Expected ']', got {self.tokenizer.current_token}")
-            self.output.write(f"<symbol> ] </symbol>\n")
-            self.tokenizer.advance()
+            self._expect_symbol("]")
         
         # Expect '='
-        if self.tokenizer.current_token != "=":
-            raise ValueError(f"Expected '=', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> = </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol("=")
         
         # Expect expression
         self.compile_expression()
         
         # Expect ';'
-        if self.tokenizer.current_token != ";":
-            raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(";")
         
-        self.output.write("</letStatement>\n")
+        write("</letStatement>\n")
 
     def compile_while(self) -> None:
         """Compiles a while statement.
         Grammar: 'while' '(' expression ')' '{' statements '}'
+        Should be called only when the current token is 'while'.
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() == "WHILE"):
-            return
-        
-        self.output.write("<whileStatement>\n")
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
-        self.tokenizer.advance()
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
+        # 'while' is written together with the '(' that follows it
+        advance()
         
         # Expect '('
-        if self.tokenizer.current_token != "(":
-            raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
-        self.tokenizer.advance()
+        self._check_symbol("(")
+        # The fixed parts of the statement are written as preassembled
+        # fragments once the tokens they stand for have been checked.
+        write("<whileStatement>\n<keyword> while </keyword>\n<symbol> ( </symbol>\n")
+        advance()
         
         # Parse expression
         self.compile_expression()
         
-        # Expect ')'
-        if self.tokenizer.current_token != ")":
-            raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
-        self.tokenizer.advance()
-        
-        # Expect '{'
-        if self.tokenizer.current_token != "{":
-            raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> {{ </symbol>\n")
-        self.tokenizer.advance()
+        # Expect ')' '{'
+        self._check_symbol(")")
+        advance()
+        self._check_symbol("{")
+        write("<symbol> ) </symbol>\n<symbol> { </symbol>\n")
+        advance()
         
         # Parse statements
         self.compile_statements()
         
         # Expect '}'
-        if self.tokenizer.current_token != "}":
-            raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> }} </symbol>\n")
-        self.tokenizer.advance()
-        
-        self.output.write("</whileStatement>\n")
+        self._check_symbol("}")
+        write("<symbol> } </symbol>\n</whileStatement>\n")
+        advance()
 
     def compile_return(self) -> None:
         """Compiles a return statement.
         Grammar: 'return' expression? ';'
+        Should be called only when the current token is 'return'.
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() == "RETURN"):
-            return
-        
-        self.output.write("<returnStatement>\n")
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
-        self.tokenizer.advance()
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
+        write("<returnStatement>\n")
+        write(_KEYWORD_XML[tokenizer.current_token])
+        advance()
         
         # Parse optional expression
-        if self.tokenizer.current_token != ";":
+        if tokenizer.current_token != ";":
             self.compile_expression()
         
         # Expect ';'
-        if self.tokenizer.current_token != ";":
-            raise ValueError(f"Expected ';', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ; </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol(";")
         
-        self.output.write("</returnStatement>\n")
+        write("</returnStatement>\n")
 
     def compile_if(self) -> None:
         """Compiles an if statement, possibly with a trailing else clause.
         Grammar: 'if' '(' expression ')' '{' statements '}' ('else' '{' statements '}')?
+        Should be called only when the current token is 'if'.
         """
-        if not (self.tokenizer.token_type() == "KEYWORD" and 
-                self.tokenizer.keyword() == "IF"):
-            return
-        
-        self.output.write("<ifStatement>\n")
-        self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
-        self.tokenizer.advance()
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
+        # 'if' is written together with the '(' that follows it
+        advance()
         
         # Expect '('
-        if self.tokenizer.current_token != "(":
-            raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ( </symbol>\n")
-        self.tokenizer.advance()
+        self._check_symbol("(")
+        # The fixed parts of the statement are written as preassembled
+        # fragments once the tokens they stand for have been checked.
+        write("<ifStatement>\n<keyword> if </keyword>\n<symbol> ( </symbol>\n")
+        advance()
         
         # Parse expression
         self.compile_expression()
         
-        # Expect ')'
-        if self.tokenizer.current_token != ")":
-            raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> ) </symbol>\n")
-        self.tokenizer.advance()
-        
-        # Expect '{'
-        if self.tokenizer.current_token != "{":
-            raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> {{ </symbol>\n")
-        self.tokenizer.advance()
+        # Expect ')' '{'
+        self._check_symbol(")")
+        advance()
+        self._check_symbol("{")
+        write("<symbol> ) </symbol>\n<symbol> { </symbol>\n")
+        advance()
         
         # Parse statements
         self.compile_statements()
         
         # Expect '}'
-        if self.tokenizer.current_token != "}":
-            raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> }} </symbol>\n")
-        self.tokenizer.advance()
+        self._check_symbol("}")
+        advance()
         
         # Handle optional else clause
-        if (self.tokenizer.token_type() == "KEYWORD" and 
-            self.tokenizer.keyword() == "ELSE"):
-            self.output.write(f"<keyword> else </keyword>\n")
-            self.tokenizer.advance()
+        if tokenizer.current_kw == KW_ELSE:
+            advance()
             
             # Expect '{'
-            if self.tokenizer.current_token != "{":
-                raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-            self.output.write(f"<symbol> {{ </symbol>\n")
-            self.tokenizer.advance()
+            self._check_symbol("{")
+            write("<symbol> } </symbol>\n<keyword> else </keyword>\n<symbol> { </symbol>\n")
+            advance()
             
             # Parse statements
             self.compile_statements()
             
             # Expect '}'
-            if self.tokenizer.current_token != "}":
-                raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-            self.output.write(f"<symbol> }} </symbol>\n")
-            self.tokenizer.advance()
+            self._check_symbol("}")
+            advance()
         
-        self.output.write("</ifStatement>\n")
-                            
+        write("<symbol> } </symbol>\n</ifStatement>\n")
 
     def compile_expression(self) -> None:
         """Compiles an expression.
         Grammar: term (op term)*
         """
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
         # Check if we have content for an expression
-        if self.tokenizer.current_token in [';', ']', ')', ',']:
+        if tokenizer.current_token in _EXPRESSION_END:
             return
         
-        self.output.write("<expression>\n")
+        write("<expression>\n")
         
         # Parse first term
         self.compile_term()
         
         # Parse (op term)* - zero or more operators followed by terms
-        while (self.tokenizer.token_type() == "SYMBOL" and 
-               self.tokenizer.symbol() in ["+", "-", "*", "/", "&", "|", "<", ">", "="]):
-            # ESCAPE XML HERE
-            self.output.write(f"<symbol> {self._escape_xml(self.tokenizer.symbol())} </symbol>\n")
-            self.tokenizer.advance()
+        symbol = tokenizer.current_sym
+        while symbol in _OPS:
+            write(_SYMBOL_XML[symbol])
+            advance()
             self.compile_term()
+            symbol = tokenizer.current_sym
         
-        self.output.write("</expression>\n")
+        write("</expression>\n")
 
     def compile_term(self) -> None:
         """Compiles a term.
@@ -519,148 +548,165 @@ class CompilationEngine:
                  varName '[' expression ']' | subroutineCall | 
                  '(' expression ')' | unaryOp term
         """
-        self.output.write("<term>\n")
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
+        write("<term>\n")
         
         # Handle unary operators: unaryOp term
-        if self.tokenizer.token_type() == "SYMBOL" and self.tokenizer.symbol() in ["-", "~", "^", "#"]:
-            self.output.write(f"<symbol> {self.tokenizer.symbol()} </symbol>\n")
-            self.tokenizer.advance()
-            # Recursively compile the term after unary operator
-            self.compile_term()
-            self.output.write("</term>\n")
-            return
+        # Each unary operator opens a nested <term>. They are emitted in a loop
+        # rather than by recursion, and all closed after the base term.
+        open_terms = 1
+        token_type, token, _, symbol = tokenizer.peek()
+        while symbol in _UNARY_OPS:
+            write(_SYMBOL_XML[symbol])
+            write("<term>\n")
+            advance()
+            open_terms += 1
+            token_type, token, _, symbol = tokenizer.peek()
         
         # Handle parenthesized expression: '(' expression ')'
-        if self.tokenizer.token_type() == "SYMBOL" and self.tokenizer.symbol() == "(":
-            self.output.write(f"<symbol> ( </symbol>\n")
-            self.tokenizer.advance()
+        if symbol == "(":
+            write(_SYMBOL_XML["("])
+            advance()
             self.compile_expression()
-            if self.tokenizer.current_token != ")":
-                raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-            self.output.write(f"<symbol> ) </symbol>\n")
-            self.tokenizer.advance()
-            self.output.write("</term>\n")
-            return
-        
-        # Handle integer constant
-        if self.tokenizer.token_type() == "INT_CONST":
-            self.output.write(f"<integerConstant> {self.tokenizer.int_val()} </integerConstant>\n")
-            self.tokenizer.advance()
-            self.output.write("</term>\n")
-            return
-        
-        # Handle string constant
-        if self.tokenizer.token_type() == "STRING_CONST":
-            # ESCAPE XML HERE
-            self.output.write(f"<stringConstant> {self._escape_xml(self.tokenizer.string_val())} </stringConstant>\n")
-            self.tokenizer.advance()
-            self.output.write("</term>\n")
-            return
-        
-        # Handle keyword constant (true, false, null, this)
-        if self.tokenizer.token_type() == "KEYWORD" and self.tokenizer.keyword().lower() in ["true", "false", "null", "this"]:
-            self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
-            self.tokenizer.advance()
-            self.output.write("</term>\n")
-            return
-        
-        # Handle identifier: varName, varName '[' expression ']', or subroutineCall
-        if self.tokenizer.token_type() == "IDENTIFIER":
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-            self.tokenizer.advance()
-            
-            # Array subscript: varName '[' expression ']'
-            if self.tokenizer.current_token == "[":
-                self.output.write(f"<symbol> [ </symbol>\n")
-                self.tokenizer.advance()
-                self.compile_expression()
-                if self.tokenizer.current_token != "]":
-                     raise ValueError(f"Expected ']', got {self.tokenizer.current_token}")
-                self.output.write(f"<symbol> ] </symbol>\n")
-                self.tokenizer.advance()
+            self._expect_symbol(")")
+        else:
+            # Every other term is told apart by its token type alone
+            compile_base_term = self._term_dispatch.get(token_type)
+            if compile_base_term is None:
+                write("</term>\n" * open_terms)
+                raise ValueError(f"Expected term, got {token}")
+            compile_base_term()
+        
+        write("</term>\n" * open_terms)
+
+    def _compile_int_term(self) -> None:
+        """Compiles an integer constant term."""
+        tokenizer = self.tokenizer
+        self._out_append(f"<integerConstant> {tokenizer.int_val()} </integerConstant>\n")
+        tokenizer.advance()
+
+    def _compile_string_term(self) -> None:
+        """Compiles a string constant term."""
+        tokenizer = self.tokenizer
+        # ESCAPE XML HERE
+        self._out_append(f"<stringConstant> {self._escape_xml(tokenizer.string_val())} </stringConstant>\n")
+        tokenizer.advance()
+
+    def _compile_keyword_term(self) -> None:
+        """Compiles a keyword constant term (true, false, null, this)."""
+        tokenizer = self.tokenizer
+        token = tokenizer.current_token
+        if tokenizer.current_kw not in _KEYWORD_CONSTANTS:
+            raise ValueError(f"Expected term, got {token}")
+        self._out_append(_KEYWORD_XML[token])
+        tokenizer.advance()
+
+    def _compile_identifier_term(self) -> None:
+        """Compiles a varName, varName '[' expression ']' or subroutineCall
+        term.
+        """
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
+        write(f"<identifier> {tokenizer.identifier()} </identifier>\n")
+        advance()
+        
+        # Array subscript: varName '[' expression ']'
+        token = tokenizer.current_token
+        if token == "[":
+            write(_SYMBOL_XML["["])
+            advance()
+            self.compile_expression()
+            self._expect_symbol("]")
+        
+        # Subroutine call: . or (
+        elif token == "." or token == "(":
+            if token == ".":
+                write(_SYMBOL_XML["."])
+                advance()
+                if tokenizer.current_type != TT_IDENTIFIER:
+                    raise ValueError(f"Expected subroutine name, got {tokenizer.current_token}")
+                write(f"<identifier> {tokenizer.identifier()} </identifier>\n")
+                advance()
             
-            # Subroutine call: . or (
-            elif self.tokenizer.current_token == "." or self.tokenizer.current_token == "(":
-                 if self.tokenizer.current_token == ".":
-                     self.output.write(f"<symbol> . </symbol>\n")
-                     self.tokenizer.advance()
-                     if self.tokenizer.token_type() != "IDENTIFIER":
-                         raise ValueError(f"Expected subroutine name, got {self.tokenizer.current_token}")
-                     self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-                     self.tokenizer.advance()
-                
-                 if self.tokenizer.current_token != "(":
-                     raise ValueError(f"Expected '(', got {self.tokenizer.current_token}")
-                 self.output.write(f"<symbol> ( </symbol>\n")
-                 self.tokenizer.advance()
-                
-                 self.output.write("<expressionList>\n")
-                 self.compile_expression_list()
-                 self.output.write("</expressionList>\n")
-                
-                 if self.tokenizer.current_token != ")":
-                     raise ValueError(f"Expected ')', got {self.tokenizer.current_token}")
-                 self.output.write(f"<symbol> ) </symbol>\n")
-                 self.tokenizer.advance()
-
-            self.output.write("</term>\n")
-            return
+            self._compile_call_arguments()
+    
+    def _compile_call_arguments(self) -> None:
+        """Compiles the '(' expressionList ')' that ends every subroutine
+        call, for both do statements and call terms.
+        """
+        tokenizer = self.tokenizer
+        write = self._out_append
+        self._check_symbol("(")
+        write("<symbol> ( </symbol>\n<expressionList>\n")
+        tokenizer.advance()
+        
+        self.compile_expression_list()
         
-        self.output.write("</term>\n")
-        raise ValueError(f"Expected term, got {self.tokenizer.current_token}")
+        self._check_symbol(")")
+        write("</expressionList>\n<symbol> ) </symbol>\n")
+        tokenizer.advance()
     
     def compile_expression_list(self) -> None:
         """Compiles a (possibly empty) comma-separated list of expressions.
         Grammar: (expression (',' expression)* )?
         """
+        tokenizer = self.tokenizer
         # Check if empty
-        if self.tokenizer.current_token == ")":
+        if tokenizer.current_token == ")":
             return
         
         # Parse first expression
         self.compile_expression()
         
+        # Most calls take zero or one argument and return before the loop
+        # locals below are set up.
+        if tokenizer.current_token != ",":
+            return
+        advance = tokenizer.advance
+        write = self._out_append
+        compile_expression = self.compile_expression
+        
         # Parse additional expressions
-        while self.tokenizer.current_token == ",":
-            self.output.write(f"<symbol> , </symbol>\n")
-            self.tokenizer.advance()
-            self.compile_expression()
+        while tokenizer.current_token == ",":
+            write(_SYMBOL_XML[","])
+            advance()
+            compile_expression()
 
     def compile_subroutine_body(self) -> None:
         """Compiles a subroutine body.
         Grammar: '{' varDec* statements '}'
         """
-        if self.tokenizer.current_token != "{":
-            raise ValueError(f"Expected '{{', got {self.tokenizer.current_token}")
-        
-        self.output.write("<subroutineBody>\n")
-        self.output.write(f"<symbol> {{ </symbol>\n")
-        self.tokenizer.advance()
+        tokenizer = self.tokenizer
+        advance = tokenizer.advance
+        write = self._out_append
+        write("<subroutineBody>\n")
+        self._expect_symbol("{")
         
         # Parse varDec* (zero or more)
-        while (self.tokenizer.token_type() == "KEYWORD" and 
-               self.tokenizer.keyword() == "VAR"):
-            self.compile_var_dec()
+        compile_var_dec = self.compile_var_dec
+        while tokenizer.current_kw == KW_VAR:
+            compile_var_dec()
         
         # Parse statements
         self.compile_statements()
         
         # Parse '}'
-        if self.tokenizer.current_token != "}":
-            raise ValueError(f"Expected '}}', got {self.tokenizer.current_token}")
-        self.output.write(f"<symbol> }} </symbol>\n")
-        self.tokenizer.advance()
+        self._expect_symbol("}")
         
-        self.output.write("</subroutineBody>\n")
+        write("</subroutineBody>\n")
 
     def _parse_type(self) -> None:
         """Helper method to parse a type (int | char | boolean | className)."""
-        if self.tokenizer.token_type() == "KEYWORD" and \
-           self.tokenizer.keyword() in ["INT", "CHAR", "BOOLEAN"]:
-            self.output.write(f"<keyword> {self.tokenizer.keyword().lower()} </keyword>\n")
-            self.tokenizer.advance()
-        elif self.tokenizer.token_type() == "IDENTIFIER":
-            self.output.write(f"<identifier> {self.tokenizer.identifier()} </identifier>\n")
-            self.tokenizer.advance()
+        tokenizer = self.tokenizer
+        token_type, token, keyword, _ = tokenizer.peek()
+        type_xml = _TYPE_KEYWORD_XML.get(keyword)
+        if type_xml is not None:
+            self._out_append(type_xml)
+        elif token_type == TT_IDENTIFIER:
+            self._out_append(f"<identifier> {token} </identifier>\n")
         else:
-            raise ValueError(f"Expected type, got {self.tokenizer.current_token}")
\ No newline at end of file
+            raise ValueError(f"Expected type, got {token}")
+        tokenizer.advance()
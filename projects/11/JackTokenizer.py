@@ -5,22 +5,114 @@ was written by Aviv Yaish. It is an extension to the specifications given
 as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import functools
+import re
 import typing
 
-Keywords = {'class', 'constructor' , 'function' , 'method' , 'field' , 
+Keywords = frozenset({'class', 'constructor' , 'function' , 'method' , 'field' , 
                'static' , 'var' , 'int' , 'char' , 'boolean' , 'void' , 'true' ,
                'false' , 'null' , 'this' , 'let' , 'do' , 'if' , 'else' , 
-               'while' , 'return'}
+               'while' , 'return'})
 
-Symbols = {'{' , '}' , '(' , ')' , '[' , ']' , '.' , ',' , ';' , '+' , 
-              '-' , '*' , '/' , '&' , '|' , '<' , '>' , '=' , '~' , '^' , '#'}
+# Integer ids for the keywords, so that keywords can be told apart with a
+# single integer comparison instead of a string comparison.
+(KW_CLASS, KW_METHOD, KW_FUNCTION, KW_CONSTRUCTOR, KW_INT, KW_BOOLEAN, KW_CHAR,
+ KW_VOID, KW_VAR, KW_STATIC, KW_FIELD, KW_LET, KW_DO, KW_IF, KW_ELSE, KW_WHILE,
+ KW_RETURN, KW_TRUE, KW_FALSE, KW_NULL, KW_THIS) = range(21)
+
+KeywordIds = {'class': KW_CLASS, 'method': KW_METHOD, 'function': KW_FUNCTION,
+              'constructor': KW_CONSTRUCTOR, 'int': KW_INT,
+              'boolean': KW_BOOLEAN, 'char': KW_CHAR, 'void': KW_VOID,
+              'var': KW_VAR, 'static': KW_STATIC, 'field': KW_FIELD,
+              'let': KW_LET, 'do': KW_DO, 'if': KW_IF, 'else': KW_ELSE,
+              'while': KW_WHILE, 'return': KW_RETURN, 'true': KW_TRUE,
+              'false': KW_FALSE, 'null': KW_NULL, 'this': KW_THIS}
+
+# Integer ids for the token types, indexed into TokenTypes.
+(TT_KEYWORD, TT_SYMBOL, TT_IDENTIFIER, TT_INT_CONST, TT_STRING_CONST) = range(5)
+
+TokenTypes = ("KEYWORD", "SYMBOL", "IDENTIFIER", "INT_CONST", "STRING_CONST")
+
+Symbols = frozenset({'{' , '}' , '(' , ')' , '[' , ']' , '.' , ',' , ';' , '+' , 
+              '-' , '*' , '/' , '&' , '|' , '<' , '>' , '=' , '~' , '^' , '#'})
+
+# Matches a comment, or a string constant (group 1) so that comment markers
+# inside strings are skipped over. Substituting r"\1" deletes the comments
+# and keeps the strings. An unterminated block comment runs to the end of
+# the input.
+CommentPattern = re.compile(r'("[^"\n]*")|//[^\n]*|/\*.*?(?:\*/|\Z)',
+                            re.DOTALL)
+
+# Matches one token of comment-free input: a string constant, a run of
+# characters that are neither whitespace nor symbols, or a single symbol.
+TokenPattern = re.compile(
+    r'"[^"]*"|[^\s"{}()\[\].,;+\-*/&|<>=~^#]+|[{}()\[\].,;+\-*/&|<>=~^#]')
 
 IntegerConstantRange = range(0, 32768)
 
-StringConstantDelimiter = {'"', '\n'}
+IdentifierStartChars = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_")
+IdentifierChars = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_")
+
+# Translation table that deletes every identifier character: a token is made
+# of identifier characters only if translating it leaves an empty string.
+StripIdentifierChars = str.maketrans('', '', ''.join(sorted(IdentifierChars)))
+
+# Number of distinct tokens whose classification is cached. Keywords,
+# symbols and common names stay cached, while the identifiers and strings
+# of a long run over many files cannot grow the caches without bound.
+TokenCacheSize = 4096
+
+
+@functools.lru_cache(maxsize=TokenCacheSize)
+def _classify(token: str) -> int:
+    """Classifies a token. Tokens repeat a lot within a file and across
+    files, so the result is cached by token string, in a bounded LRU cache.
+
+    Args:
+        token (str): the token to classify.
+
+    Returns:
+        int: the id of the type of the token, one of the TT_* constants.
+    """
+    # Check for keyword
+    if token in Keywords:
+        return TT_KEYWORD
+    # Check for symbol
+    elif token in Symbols:
+        return TT_SYMBOL
+    # Check for integer constant (only digits, within range 0-32767)
+    elif token.isdigit() and int(token) in IntegerConstantRange:
+        return TT_INT_CONST
+    # Check for string constant (enclosed in quotes, no internal quotes or newlines)
+    elif (token.startswith('"') and 
+          token.endswith('"') and 
+          '\n' not in token and '"' not in token[1:-1]):
+        return TT_STRING_CONST
+    # Check for valid identifier (starts with letter or underscore, contains only valid chars)
+    elif (len(token) > 0 and 
+          token[0] in IdentifierStartChars and 
+          not token.translate(StripIdentifierChars)):
+        return TT_IDENTIFIER
+    else:
+        # Invalid token - shouldn't happen with valid Jack code
+        return TT_IDENTIFIER
+
+
+@functools.lru_cache(maxsize=TokenCacheSize)
+def _describe(token: str) -> typing.Tuple[int, str, int,
+                                          typing.Optional[str]]:
+    """Describes a token as JackTokenizer.peek() does, cached by token string.
+
+    Args:
+        token (str): the token to describe.
+
+    Returns:
+        typing.Tuple[int, str, int, typing.Optional[str]]: the token type id,
+        the token, its keyword id or -1, and its symbol or None.
+    """
+    return (_classify(token), token, KeywordIds.get(token, -1),
+            token if token in Symbols else None)
 
-IdentifierStartChars = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_")
-IdentifierChars = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_")
 
 class JackTokenizer:
     """Removes all comments from the input stream and breaks it
@@ -106,6 +198,12 @@ class JackTokenizer:
     Note that ^, # correspond to shiftleft and shiftright, respectively.
     """
 
+    # Fixed attribute layout: the current_* attributes are read and written
+    # once per token.
+    __slots__ = ("input", "tokens", "descriptions", "current_index",
+                 "current_token", "current_type", "current_kw", "current_sym",
+                 "_peek")
+
     def __init__(self, input_stream: typing.TextIO) -> None:
         """Opens the input stream and gets ready to tokenize it.
 
@@ -115,44 +213,20 @@ class JackTokenizer:
         # Your code goes here!
         # A good place to start is to read all the lines of the input:
         self.input = input_stream.read()
-        self.tokens = self.input
-        # print("Untouched input:", self.input)
         self._delete_comments()
-        # print("Input without comments:", self.input)
-        self._isolate_strings()
-        # print("Tokens after isolating strings:", self.tokens)
-        self._split_non_string_tokens()
-        # print("Final tokens:", self.tokens)
+        # Strings, words and symbols are split off in a single scan.
+        self.tokens = TokenPattern.findall(self.input)
+        # Every token is described up front, in a list parallel to tokens,
+        # so that advance() only indexes into it.
+        self.descriptions = list(map(_describe, self.tokens))
         self.current_index = 0
         self.current_token = None
-
-    def _split_non_string_tokens(self) -> None:
-        new_tokens = []
-        for token in self.tokens:
-            if token.startswith('"') and token.endswith('"'):
-                new_tokens.append(token)
-            else:
-                current_token = ""
-                for char in token:
-                    if char in Symbols:
-                        if current_token:
-                            new_tokens.append(current_token)
-                            current_token = ""
-                        new_tokens.append(char)
-                    elif char.isspace():
-                        if current_token:
-                            new_tokens.append(current_token)
-                            current_token = ""
-                    else:
-                        current_token += char
-                if current_token:
-                    new_tokens.append(current_token)
-        self.tokens = new_tokens
-
-    def _isolate_strings(self) -> None:
-        self.tokens = self.input.split('"')
-        for i in range(1, len(self.tokens), 2):
-            self.tokens[i] = '"' + self.tokens[i] + '"'
+        # Type id (TT_*) and keyword id (KW_*) of the current token, or -1,
+        # and the current token if it is a symbol, or None.
+        self.current_type = -1
+        self.current_kw = -1
+        self.current_sym = None
+        self._peek = (-1, None, -1, None)
 
     def _delete_comments(self) -> str:
         """Deletes all comments from the input string.
@@ -162,35 +236,7 @@ class JackTokenizer:
         Returns:
             str: input string without comments.
         """
-        in_block_comment = False
-        in_line_comment = False
-        i = 0
-        result = ""
-        while i < len(self.input):
-            if in_block_comment:
-                if self.input[i:i+2] == '*/':
-                    in_block_comment = False
-                    i += 2
-                else:
-                    i += 1
-            elif in_line_comment:
-                if self.input[i] == '\n':
-                    in_line_comment = False
-                    result += self.input[i]
-                    i += 1
-                else:
-                    i += 1
-            else:
-                if self.input[i:i+2] == '/*':
-                    in_block_comment = True
-                    i += 2
-                elif self.input[i:i+2] == '//':
-                    in_line_comment = True
-                    i += 2
-                else:
-                    result += self.input[i]
-                    i += 1
-        self.input = result
+        self.input = CommentPattern.sub(r"\1", self.input)
 
     def has_more_tokens(self) -> bool:
         """Do we have more tokens in the input?
@@ -208,8 +254,21 @@ class JackTokenizer:
         """
         # Your code goes here!
         if self.has_more_tokens():
-            self.current_token = self.tokens[self.current_index]
+            self._peek = description = self.descriptions[self.current_index]
+            (self.current_type, self.current_token, self.current_kw,
+             self.current_sym) = description
             self.current_index += 1
+
+    def peek(self) -> typing.Tuple[int, str, int, typing.Optional[str]]:
+        """Describes the current token in one call, so that a parser does not
+        need token_type(), keyword() and symbol() to inspect it.
+
+        Returns:
+            typing.Tuple[int, str, int, typing.Optional[str]]: the token type
+            id (TT_*), the token itself, the keyword id (KW_*) or -1, and the
+            symbol or None.
+        """
+        return self._peek
              
     def token_type(self) -> str:
         """
@@ -217,28 +276,9 @@ class JackTokenizer:
             str: the type of the current token, can be
             "KEYWORD", "SYMBOL", "IDENTIFIER", "INT_CONST", "STRING_CONST"
         """
-        # Check for keyword
-        if self.current_token in Keywords:
-            return "KEYWORD"
-        # Check for symbol
-        elif self.current_token in Symbols:
-            return "SYMBOL"
-        # Check for integer constant (only digits, within range 0-32767)
-        elif self.current_token.isdigit() and int(self.current_token) in IntegerConstantRange:
-            return "INT_CONST"
-        # Check for string constant (enclosed in quotes, no internal quotes or newlines)
-        elif (self.current_token.startswith('"') and 
-              self.current_token.endswith('"') and 
-              '\n' not in self.current_token and '"' not in self.current_token[1:-1]):
-            return "STRING_CONST"
-        # Check for valid identifier (starts with letter or underscore, contains only valid chars)
-        elif (len(self.current_token) > 0 and 
-              self.current_token[0] in IdentifierStartChars and 
-              all(c in IdentifierChars for c in self.current_token)):
-            return "IDENTIFIER"
-        else:
-            # Invalid token - shouldn't happen with valid Jack code
-            return "IDENTIFIER"
+        if self.current_type < 0:
+            return None
+        return TokenTypes[self.current_type]
 
     def keyword(self) -> str:
         """
@@ -250,7 +290,7 @@ class JackTokenizer:
             "IF", "ELSE", "WHILE", "RETURN", "TRUE", "FALSE", "NULL", "THIS"
         """
         # Your code goes here!
-        if self.token_type() == "KEYWORD":
+        if self.current_type == TT_KEYWORD:
             return self.current_token.upper()
         else:
             raise ValueError("Current token is not a keyword")
@@ -265,7 +305,7 @@ class JackTokenizer:
               '-' | '*' | '/' | '&' | '|' | '<' | '>' | '=' | '~' | '^' | '#'
         """
         # Your code goes here!
-        if self.token_type() == "SYMBOL":
+        if self.current_type == TT_SYMBOL:
             return self.current_token
         else:
             raise ValueError("Current token is not a symbol")
@@ -280,7 +320,7 @@ class JackTokenizer:
                   starting with a digit. You can assume keywords cannot be
                   identifiers, so 'self' cannot be an identifier, etc'.
         """
-        if self.token_type() != "IDENTIFIER":
+        if self.current_type != TT_IDENTIFIER:
             raise ValueError(f"Current token '{self.current_token}' is not a valid identifier")
         return self.current_token
 
@@ -293,7 +333,7 @@ class JackTokenizer:
             integerConstant: A decimal number in the range 0-32767.
         """
         # Your code goes here!
-        if self.token_type() == "INT_CONST":
+        if self.current_type == TT_INT_CONST:
             return int(self.current_token)
         else:
             raise ValueError("Current token is not an integer constant")
@@ -308,7 +348,7 @@ class JackTokenizer:
                       double quote or newline '"'
         """
         # Your code goes here!
-        if self.token_type() == "STRING_CONST":
+        if self.current_type == TT_STRING_CONST:
             return self.current_token[1:-1]
         else:
             raise ValueError("Current token is not a string constant")
\ No newline at end of file
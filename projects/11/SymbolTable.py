@@ -14,6 +14,9 @@ class SymbolTable:
     scopes (class/subroutine).
     """
 
+    # Fixed attribute layout: the scopes are read on every identifier lookup.
+    __slots__ = ("class_scope", "subroutine_scope", "index_counters")
+
     def __init__(self) -> None:
         """Creates a new empty symbol table."""
         # Your code goes here!
@@ -109,12 +112,20 @@ class SymbolTable:
             return record[2]  # index is at index 2
         return None
 
+    def helper_lookup(
+            self, name: str) -> typing.Optional[typing.Tuple[str, str, int]]:
+        """Looks up an identifier once, for callers that need more than one of
+        its type, kind and index.
 
-    def helper_lookup(self, name: str) -> typing.Tuple[str, str, int]:
+        Args:
+            name (str): name of an identifier.
 
-        if name in self.subroutine_scope:
-            return self.subroutine_scope[name]
-        elif name in self.class_scope:
-            return self.class_scope[name]
-        else:
-            return None
+        Returns:
+            typing.Optional[typing.Tuple[str, str, int]]: the (type, kind,
+            index) record of the named identifier in the current scope, or
+            None if the identifier is unknown in the current scope.
+        """
+        record = self.subroutine_scope.get(name)
+        if record is None:
+            record = self.class_scope.get(name)
+        return record
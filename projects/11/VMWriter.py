@@ -8,43 +8,51 @@ Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 import typing
 
 
+# VM segment of each segment or variable kind name; VAR and FIELD are the
+# symbol table kinds, so a variable's kind can be passed as its segment.
+_SEGMENTS = {
+    "CONST": "constant",
+    "ARG": "argument",
+    "LOCAL": "local",
+    "STATIC": "static",
+    "THIS": "this",
+    "THAT": "that",
+    "POINTER": "pointer",
+    "TEMP": "temp",
+    "VAR": "local",
+    "FIELD": "this",
+}
+
+# Push and pop commands up to their index, so that a command is built by
+# concatenating the index instead of formatting the whole line.
+_PUSH_PREFIX = {name: f"push {segment} " for name, segment in _SEGMENTS.items()}
+_POP_PREFIX = {name: f"pop {segment} " for name, segment in _SEGMENTS.items()}
+
+# The complete line of each arithmetic command, by its name.
+_ARITHMETIC_VM = {command: command.lower() + "\n" for command in (
+    "ADD", "SUB", "NEG", "EQ", "GT", "LT", "AND", "OR", "NOT", "SHIFTLEFT",
+    "SHIFTRIGHT")}
+
+
 class VMWriter:
     """
     Writes VM commands into a file. Encapsulates the VM command syntax.
+
+    Commands are buffered and only reach the output stream on flush() or
+    close(), so one of them must be called once the class is compiled.
     """
 
+    # Fixed attribute layout: the buffer is appended to on every command.
+    __slots__ = ("output_stream", "_buf")
+
     def __init__(self, output_stream: typing.TextIO) -> None:
         """Creates a new file and prepares it for writing VM commands."""
         # Your code goes here!
         # Note that you can write to output_stream like so:
         # output_stream.write("Hello world! \n")
         self.output_stream = output_stream
-        self.segment_map = {
-        "CONST": "constant",
-        "ARG": "argument",
-        "LOCAL": "local",
-        "STATIC": "static",
-        "THIS": "this",
-        "THAT": "that",
-        "POINTER": "pointer",
-        "TEMP": "temp",
-        "VAR": "local",  
-        "FIELD": "this"
-        }
-        self.arithmetic_map = {
-        "ADD": "add",
-        "SUB": "sub",
-        "NEG": "neg",
-        "EQ": "eq",
-        "GT": "gt",
-        "LT": "lt",
-        "AND": "and",
-        "OR": "or",
-        "NOT": "not",
-        "SHIFTLEFT": "shiftleft",
-        "SHIFTRIGHT": "shiftright"
-        }
-
+        # Commands are collected here and written out together by flush().
+        self._buf = []
 
     def write_push(self, segment: str, index: int) -> None:
         """Writes a VM push command.
@@ -55,9 +63,9 @@ class VMWriter:
             index (int): the index to push to.
         """
         # Your code goes here!
-        vm_segment = self.segment_map.get(segment)
-        if vm_segment is not None:
-            self.output_stream.write(f"push {vm_segment} {index}\n")
+        prefix = _PUSH_PREFIX.get(segment)
+        if prefix is not None:
+            self._buf.append(prefix + str(index) + "\n")
 
     def write_pop(self, segment: str, index: int) -> None:
         """Writes a VM pop command.
@@ -68,9 +76,9 @@ class VMWriter:
             index (int): the index to pop from.
         """
         # Your code goes here!
-        vm_segment = self.segment_map.get(segment)
-        if vm_segment is not None:
-            self.output_stream.write(f"pop {vm_segment} {index}\n")
+        prefix = _POP_PREFIX.get(segment)
+        if prefix is not None:
+            self._buf.append(prefix + str(index) + "\n")
 
     def write_arithmetic(self, command: str) -> None:
         """Writes a VM arithmetic command.
@@ -80,9 +88,9 @@ class VMWriter:
             "EQ", "GT", "LT", "AND", "OR", "NOT", "SHIFTLEFT", "SHIFTRIGHT".
         """
         # Your code goes here!
-        vm_segment = self.arithmetic_map.get(command)
-        if vm_segment is not None:
-            self.output_stream.write(f"{vm_segment}\n")
+        vm_command = _ARITHMETIC_VM.get(command)
+        if vm_command is not None:
+            self._buf.append(vm_command)
 
     def write_label(self, label: str) -> None:
         """Writes a VM label command.
@@ -91,7 +99,7 @@ class VMWriter:
             label (str): the label to write.
         """
         # Your code goes here!
-        self.output_stream.write(f"label {label}\n")
+        self._buf.append(f"label {label}\n")
 
     def write_goto(self, label: str) -> None:
         """Writes a VM goto command.
@@ -100,7 +108,7 @@ class VMWriter:
             label (str): the label to go to.
         """
         # Your code goes here!
-        self.output_stream.write(f"goto {label}\n")
+        self._buf.append(f"goto {label}\n")
 
     def write_if(self, label: str) -> None:
         """Writes a VM if-goto command.
@@ -109,7 +117,7 @@ class VMWriter:
             label (str): the label to go to.
         """
         # Your code goes here!
-        self.output_stream.write(f"if-goto {label}\n")
+        self._buf.append(f"if-goto {label}\n")
 
     def write_call(self, name: str, n_args: int) -> None:
         """Writes a VM call command.
@@ -119,7 +127,7 @@ class VMWriter:
             n_args (int): the number of arguments the function receives.
         """
         # Your code goes here!
-        self.output_stream.write(f"call {name} {n_args}\n")
+        self._buf.append(f"call {name} {n_args}\n")
 
     def write_function(self, name: str, n_locals: int) -> None:
         """Writes a VM function command.
@@ -129,9 +137,21 @@ class VMWriter:
             n_locals (int): the number of local variables the function uses.
         """
         # Your code goes here!
-        self.output_stream.write(f"function {name} {n_locals}\n")
+        self._buf.append(f"function {name} {n_locals}\n")
 
     def write_return(self) -> None:
         """Writes a VM return command."""
         # Your code goes here!
-        self.output_stream.write("return\n")
+        self._buf.append("return\n")
+
+    def flush(self) -> None:
+        """Writes all the buffered commands to the output stream. Should be
+        called once the whole class has been compiled.
+        """
+        self.output_stream.write("".join(self._buf))
+        self._buf.clear()
+
+    def close(self) -> None:
+        """Writes any buffered commands and closes the output file."""
+        self.flush()
+        self.output_stream.close()